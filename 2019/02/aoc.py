@@ -1,142 +1,214 @@
 #!/usr/bin/python3
+import os
+import sys
 
+# The shared Intcode package lives alongside the day directories
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from intcode import IntcodeProgram, InvalidOpCode
 
-class Instruction:
-    def __init__(self, opcode, parameter_count, method):
-        self.opcode = opcode
-        self.parameter_count = parameter_count
-        self.method = method
 
-    def __eq__(self, other):
-        if isinstance(other, int):
-            return self.opcode == other
-        if isinstance(other, Instruction):
-            return self.opcode == other.opcode
-        raise InvalidOpCode(other)
-
-    def execute(self, memory, memory_offset):
-        parameters = []
-        if self.parameter_count >= 1:
-            for index in range(1, self.parameter_count + 1):
-                parameters.append(memory[memory_offset + index])
-        self.method(memory, parameters)
-
-    def next_instruction_pointer(self, instruction_pointer):
-        return instruction_pointer + self.parameter_count + 1
-
-
-class ProgramHalted(BaseException):
+class SymbolicControlFlow(BaseException):
+    """
+    Raised when the result of a symbolic run depends on its symbols in a way a Polynomial can't
+    express, such as an opcode or written address that changes with them
+    """
     pass
 
 
-class InvalidOpCode(BaseException):
-    def __init__(self, opcode, instruction_pointer=None):
-        self.opcode = opcode
-        self.instruction_pointer = instruction_pointer
-
-    def __str__(self):
-        return f'Invalid OpCode [{self.opcode}] encountered' \
-               f'{f" at pointer {self.instruction_pointer}" if self.instruction_pointer else ""}'
-
-
-class Program:
-
-    def __init__(self):
-        self._memory = {}
-        self._instructions = {}
-        self._next_instruction = 0
-
-    def __str__(self):
-        return ','.join([str(x) for x in self._memory.values()])
-
-    def add_instruction(self, instruction):
-        self._instructions[instruction.opcode] = instruction
-
-    def get_instruction_by_opcode(self, opcode):
-        try:
-            return self._instructions[opcode]
-        except KeyError:
-            raise InvalidOpCode(opcode)
-
-    def initialize_memory_from_file(self, file_name):
-        with open(file_name, 'r') as txt:
-            for position, code in enumerate(txt.read().strip().split(',')):
-                self.set_memory_address(position, code)
-
-    def dump_memory(self):
-        return dict(self._memory)
-
-    def load_memory(self, memory):
-        if not isinstance(memory, dict):
-            raise Exception('Failed loading invalid memory')
-        self._memory.update(memory)
-        self._next_instruction = 0
-
-    def set_memory_address(self, address, code):
-        self._memory[address] = int(code)
-
-    def get_memory_address(self, address):
-        return self._memory[address]
+class Polynomial:
+    """
+    Polynomial in named symbols with integer coefficients.  Terms map a monomial, a sorted tuple of
+    (symbol, power) pairs with () for the constant, to its coefficient
+    """
 
-    def execute_next(self):
-        instruction = self.get_instruction_by_opcode(self.get_memory_address(self._next_instruction))
+    def __init__(self, terms):
+        self.terms = {monomial: coefficient for monomial, coefficient in terms.items() if coefficient}
 
-        instruction.execute(self._memory, self._next_instruction)
+    @staticmethod
+    def symbol(name):
+        return Polynomial({((name, 1),): 1})
 
-        self._next_instruction = instruction.next_instruction_pointer(self._next_instruction)
+    @staticmethod
+    def _coerce(value):
+        return value if isinstance(value, Polynomial) else Polynomial({(): value})
 
-    def run(self):
-        try:
-            while True:
-                self.execute_next()
-        except ProgramHalted:
-            pass
-        except InvalidOpCode as exc:
-            print(exc)
+    def __add__(self, other):
+        terms = dict(self.terms)
+        for monomial, coefficient in Polynomial._coerce(other).terms.items():
+            terms[monomial] = terms.get(monomial, 0) + coefficient
+        return Polynomial(terms)
 
-        return self.get_memory_address(0)
+    def __mul__(self, other):
+        terms = {}
+        for left, left_coefficient in self.terms.items():
+            for right, right_coefficient in Polynomial._coerce(other).terms.items():
+                powers = dict(left)
+                for name, power in right:
+                    powers[name] = powers.get(name, 0) + power
+                monomial = tuple(sorted(powers.items()))
+                terms[monomial] = terms.get(monomial, 0) + left_coefficient * right_coefficient
+        return Polynomial(terms)
 
+    __radd__ = __add__
+    __rmul__ = __mul__
 
-ADD_INSTRUCTION = Instruction(1, 3, lambda memory, parameters: memory.update(
-    {(parameters[2]): memory[parameters[0]] + memory[parameters[1]]}
-))
-MUL_INSTRUCTION = Instruction(2, 3, lambda memory, parameters: memory.update(
-    {(parameters[2]): memory[parameters[0]] * memory[parameters[1]]}
-))
-HALT_INSTRUCTION = Instruction(99, 0, lambda memory, parameters=(): (_ for _ in parameters).throw(ProgramHalted))
-
-
-def run_until_target(program, initial_state, target=None):
+    def __str__(self):
+        if not self.terms:
+            return '0'
+        return ' + '.join(
+            '*'.join(([str(coefficient)] if coefficient != 1 or not monomial else []) +
+                     [name if power == 1 else f'{name}^{power}' for name, power in monomial])
+            for monomial, coefficient in sorted(self.terms.items(), reverse=True)
+        )
+
+    def substitute(self, **values):
+        """
+        Polynomial with the given symbols replaced by values
+        """
+        result = Polynomial({})
+        for monomial, coefficient in self.terms.items():
+            term = Polynomial({tuple((name, power) for name, power in monomial if name not in values): coefficient})
+            for name, power in monomial:
+                if name in values:
+                    term = term * values[name] ** power
+            result = result + term
+        return result
+
+    def coefficient(self, monomial=()):
+        return self.terms.get(monomial, 0)
+
+    def degree(self, name):
+        return max((power for monomial in self.terms for symbol, power in monomial if symbol == name), default=0)
+
+
+# Value of a cell read through an address that depends on symbols
+UNKNOWN = object()
+
+
+def run(program):
+    program.run_to_end()
+    return program.get_memory_address(0)
+
+
+def run_symbolic(program, symbols):
+    """
+    Run the add/mul program once with the cells in symbols, a dict of address to symbol name, held
+    as symbols rather than values and return memory[0] as a Polynomial in them.  A cell read
+    through an address that depends on a symbol is UNKNOWN, which is fine until an unknown or
+    symbolic value has to pick an opcode or a written address, or ends up in memory[0]
+    """
+    image = program.dump_memory()
+    memory = dict(enumerate(image.cells))
+    memory.update(image.sparse)
+    for address, name in symbols.items():
+        memory[address] = Polynomial.symbol(name)
+
+    def read(address):
+        return memory.get(address, 0) if isinstance(address, int) else UNKNOWN
+
+    pointer = 0
+    while True:
+        opcode = read(pointer)
+        if not isinstance(opcode, int):
+            raise SymbolicControlFlow(f'Opcode at pointer {pointer} depends on {", ".join(symbols.values())}')
+        if opcode == 99:
+            break
+        if opcode not in (1, 2):
+            raise InvalidOpCode(opcode, pointer)
+
+        first, second, target = (read(pointer + index) for index in range(1, 4))
+        if not isinstance(target, int):
+            raise SymbolicControlFlow(f'Address written at pointer {pointer} depends on '
+                                      f'{", ".join(symbols.values())}')
+
+        first, second = read(first), read(second)
+        if first is UNKNOWN or second is UNKNOWN:
+            memory[target] = UNKNOWN
+        elif opcode == 1:
+            memory[target] = first + second
+        else:
+            memory[target] = first * second
+
+        pointer += 4
+
+    if memory[0] is UNKNOWN:
+        raise SymbolicControlFlow(f'Result is read through an address that depends on '
+                                  f'{", ".join(symbols.values())}')
+    return Polynomial._coerce(memory[0])
+
+
+def solve_for_target(polynomial, target):
+    """
+    First noun and verb, in the order a search would try them, for which polynomial reaches target.
+    For each noun a polynomial of degree one in verb is solved directly, anything else is evaluated
+    for every verb
+    """
+    for noun in range(0, 100):
+        remaining = polynomial.substitute(noun=noun)
+        if remaining.degree('verb') <= 1:
+            slope = remaining.coefficient((('verb', 1),))
+            offset = remaining.coefficient()
+            if slope == 0:
+                if offset == target:
+                    return noun, 0
+            elif (target - offset) % slope == 0 and 0 <= (target - offset) // slope < 100:
+                return noun, (target - offset) // slope
+        else:
+            for verb in range(0, 100):
+                if remaining.substitute(verb=verb).coefficient() == target:
+                    return noun, verb
+
+    return None
+
+
+def run_until_target(program, target=None):
+    """
+    Work out memory[0] as a polynomial in noun and verb and solve it for target, confirming the
+    answer with one real run.  Programs whose control flow depends on noun or verb are searched
+    """
+    program.reset()
+    try:
+        solution = solve_for_target(run_symbolic(program, {1: 'noun', 2: 'verb'}), target)
+    except SymbolicControlFlow as exc:
+        print(f'{exc}, searching instead')
+        return search_until_target(program, target)
+
+    if solution is not None:
+        noun, verb = solution
+        program.reset()
+        program.set_memory_address(1, noun)
+        program.set_memory_address(2, verb)
+        if run(program) == target:
+            return noun, verb
+
+    return search_until_target(program, target)
+
+
+def search_until_target(program, target=None):
 
     for noun in range(0, 100):
         for verb in range(0, 100):
-            program.load_memory(initial_state)
+            program.reset()
             program.set_memory_address(1, noun)
             program.set_memory_address(2, verb)
 
-            execution_result = program.run()
+            execution_result = run(program)
             if execution_result == target:
                 return noun, verb
 
 
 def main():
 
-    program = Program()
-
-    program.add_instruction(ADD_INSTRUCTION)
-    program.add_instruction(MUL_INSTRUCTION)
-    program.add_instruction(HALT_INSTRUCTION)
-
+    program = IntcodeProgram()
     program.initialize_memory_from_file('input.txt')
-    initial_state = program.dump_memory()
 
     # Reset program state after "1202 program alarm"
     program.set_memory_address(1, 12)
     program.set_memory_address(2, 2)
 
-    print(f'Part One: {program.run()}')
+    print(f'Part One: {run(program)}')
 
-    noun, verb = run_until_target(program, initial_state, target=19690720)
+    noun, verb = run_until_target(program, target=19690720)
 
     print(f'Part Two: 100 * {noun} + {verb} = {100 * noun + verb}')
 
@@ -1,9 +1,11 @@
 #!/usr/bin/python3
+import os
+import sys
 from collections import defaultdict
-from queue import Queue
 
+# The shared Intcode package lives alongside the day directories
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
 from intcode import IntcodeProgram
-from exceptions import WaitingForInput, ProgramHalted
 
 
 BLACK = 0
@@ -54,65 +56,59 @@ class Robot:
 
 
 def start_on_black():
-    input_queue = Queue()
-    output_queue = Queue()
-
-    program = IntcodeProgram(io_scheme=IntcodeProgram.IOScheme.QUEUE,
-                             input_queue=input_queue,
-                             output_queue=output_queue)
+    program = IntcodeProgram(io_scheme=IntcodeProgram.IOScheme.QUEUE)
 
     program.initialize_memory_from_file('input.txt')
 
-    input_queue.put(BLACK)
+    program.queue_input(BLACK)
 
     painting_robot = Robot()
     painted_grid = defaultdict(int)
 
+    painter = program.as_coroutine()
+    response = next(painter)
+
     while True:
-        try:
-            program.execute_next()
-        except WaitingForInput:
-            new_color = output_queue.get()
-            direction = output_queue.get()
+        if response == IntcodeProgram.ExecutionStatus.NEEDS_INPUT:
+            response = painter.send(painted_grid[painting_robot.get_grid_pos()])
+        elif response == IntcodeProgram.ExecutionStatus.HALTED:
+            print('Program Complete')
+            print(f'Painted {len(painted_grid.keys())} tiles at least once')
+            break
+        else:
+            new_color, direction = response, next(painter)
 
             painted_grid[painting_robot.get_grid_pos()] = new_color
             painting_robot.move(direction)
 
-            input_queue.put(painted_grid[painting_robot.get_grid_pos()])
-        except ProgramHalted:
-            print('Program Complete')
-            print(f'Painted {len(painted_grid.keys())} tiles at least once')
-            break
+            response = next(painter)
 
 
 def start_on_white():
-    input_queue = Queue()
-    output_queue = Queue()
-
-    program = IntcodeProgram(io_scheme=IntcodeProgram.IOScheme.QUEUE,
-                             input_queue=input_queue,
-                             output_queue=output_queue)
+    program = IntcodeProgram(io_scheme=IntcodeProgram.IOScheme.QUEUE)
 
     program.initialize_memory_from_file('input.txt')
 
-    input_queue.put(WHITE)
+    program.queue_input(WHITE)
 
     painting_robot = Robot()
     painted_grid = defaultdict(int)
 
+    painter = program.as_coroutine()
+    response = next(painter)
+
     while True:
-        try:
-            program.execute_next()
-        except WaitingForInput:
-            new_color = output_queue.get()
-            direction = output_queue.get()
+        if response == IntcodeProgram.ExecutionStatus.NEEDS_INPUT:
+            response = painter.send(painted_grid[painting_robot.get_grid_pos()])
+        elif response == IntcodeProgram.ExecutionStatus.HALTED:
+            break
+        else:
+            new_color, direction = response, next(painter)
 
             painted_grid[painting_robot.get_grid_pos()] = new_color
             painting_robot.move(direction)
 
-            input_queue.put(painted_grid[painting_robot.get_grid_pos()])
-        except ProgramHalted:
-            break
+            response = next(painter)
 
     grid = [key for key in painted_grid.keys()]
     max_x = max(grid, key=lambda val: val[0])[0]
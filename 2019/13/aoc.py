@@ -1,10 +1,12 @@
 #!/usr/bin/python3
 import enum
+import os
+import sys
 from collections import defaultdict
-from queue import Queue, Empty
 
-from intcode import IntcodeProgram
-from exceptions import WaitingForInput, ProgramHalted
+# The shared Intcode package lives alongside the day directories
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from intcode import IntcodeProgram, WatchpointDiscovery
 
 
 class Tile(enum.Enum):
@@ -49,27 +51,18 @@ def get_ball_x(tiles):
     return get_key(tiles, Tile.BALL)[0]
 
 
-def process_frame(program, tiles):
-    while True:
-        try:
-            x = program.get_output(block=False)
-            y = program.get_output(block=False)
+def process_frame(outputs, tiles):
+    for index in range(0, len(outputs), 3):
+        x, y, value = outputs[index:index + 3]
 
-            if (x, y) == (-1, 0):
-                tiles[(x, y)] = program.get_output(block=False)  # score
-            else:
-                tiles[(x, y)] = Tile(program.get_output(block=False))
-        except Empty:
-            break
+        if (x, y) == (-1, 0):
+            tiles[(x, y)] = value  # score
+        else:
+            tiles[(x, y)] = Tile(value)
 
 
 def main():
-    input_queue = Queue()
-    output_queue = Queue()
-
-    program = IntcodeProgram(io_scheme=IntcodeProgram.IOScheme.QUEUE,
-                             input_queue=input_queue,
-                             output_queue=output_queue)
+    program = IntcodeProgram(io_scheme=IntcodeProgram.IOScheme.QUEUE)
     program.initialize_memory_from_file('input.txt')
     arcade_data = program.dump_memory()
 
@@ -77,14 +70,8 @@ def main():
 
     tiles = defaultdict(int)
 
-    while True:
-        try:
-            x = program.get_output(block=False)
-            y = program.get_output(block=False)
-            tile = Tile(program.get_output(block=False))
-            tiles[tile] += 1
-        except Empty:
-            break
+    for tile in program.drain_output()[2::3]:
+        tiles[Tile(tile)] += 1
 
     print(f'Block Count: {tiles[Tile.BLOCK]}')
 
@@ -93,17 +80,34 @@ def main():
 
     tiles = {}
 
-    while True:
-        try:
-            program.execute_next()
+    # Follow the ball and paddle from the screen output only until we know where they live in memory
+    discovery = WatchpointDiscovery(program, range(0, len(arcade_data)))
+    ball_address = paddle_address = None
+
+    status = program.run_until_io()
 
-        except WaitingForInput:
-            process_frame(program, tiles)
+    while status != IntcodeProgram.ExecutionStatus.HALTED:
+        if status == IntcodeProgram.ExecutionStatus.NEEDS_INPUT:
+            if ball_address is None:
+                outputs = program.drain_output()
+                process_frame(outputs, tiles)
 
-            # draw_screen(tiles)
+                for index in range(0, len(outputs), 3):
+                    if outputs[index + 2] == Tile.BALL.value:
+                        discovery.sample(Tile.BALL, outputs[index])
+                    elif outputs[index + 2] == Tile.PADDLE.value:
+                        discovery.sample(Tile.PADDLE, outputs[index])
 
-            paddle = get_paddle_x(tiles)
-            ball = get_ball_x(tiles)
+                paddle = get_paddle_x(tiles)
+                ball = get_ball_x(tiles)
+
+                if discovery.located(Tile.BALL) is not None and discovery.located(Tile.PADDLE) is not None:
+                    ball_address = discovery.located(Tile.BALL)
+                    paddle_address = discovery.located(Tile.PADDLE)
+                    discovery.close()
+            else:
+                paddle = program.get_memory_address(paddle_address)
+                ball = program.get_memory_address(ball_address)
 
             if paddle > ball:
                 program.queue_input(-1)
@@ -112,10 +116,10 @@ def main():
             else:
                 program.queue_input(0)
 
-        except ProgramHalted:
-            print('Program Complete')
-            process_frame(program, tiles)
-            break
+        status = program.run_until_io()
+
+    print('Program Complete')
+    process_frame(program.drain_output(), tiles)
 
     draw_screen(tiles)
     print(f'Final Score: {tiles[(-1, 0)]}')
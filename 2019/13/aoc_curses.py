@@ -1,11 +1,13 @@
 #!/usr/bin/python3
 import curses
 import enum
-from queue import Queue, Empty
+import os
+import sys
 from time import sleep
 
+# The shared Intcode package lives alongside the day directories
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
 from intcode import IntcodeProgram
-from exceptions import WaitingForInput, ProgramHalted
 
 
 class Tile(enum.Enum):
@@ -35,18 +37,14 @@ def draw_screen(stdscr, tiles):
     stdscr.refresh()
 
 
-def process_frame(program, tiles):
-    while True:
-        try:
-            x = program.get_output(block=False)
-            y = program.get_output(block=False)
+def process_frame(outputs, tiles):
+    for index in range(0, len(outputs), 3):
+        x, y, value = outputs[index:index + 3]
 
-            if (x, y) == (-1, 0):
-                tiles[(x, y)] = program.get_output(block=False)  # score
-            else:
-                tiles[(x, y)] = Tile(program.get_output(block=False))
-        except Empty:
-            break
+        if (x, y) == (-1, 0):
+            tiles[(x, y)] = value  # score
+        else:
+            tiles[(x, y)] = Tile(value)
 
 
 def get_key(tiles, val):
@@ -71,23 +69,20 @@ def main(stdscr):
     # Clear screen
     stdscr.clear()
 
-    input_queue = Queue()
-    output_queue = Queue()
-
-    program = IntcodeProgram(io_scheme=IntcodeProgram.IOScheme.QUEUE,
-                             input_queue=input_queue,
-                             output_queue=output_queue)
+    program = IntcodeProgram(io_scheme=IntcodeProgram.IOScheme.QUEUE)
     program.initialize_memory_from_file('input.txt')
     program.set_memory_address(0, 2)
 
     tiles = {}
 
-    while True:
-        try:
-            program.execute_next()
+    arcade = program.as_coroutine()
+    outputs = []
+    response = next(arcade)
 
-        except WaitingForInput:
-            process_frame(program, tiles)
+    while True:
+        if response == IntcodeProgram.ExecutionStatus.NEEDS_INPUT:
+            process_frame(outputs, tiles)
+            outputs = []
 
             draw_screen(stdscr, tiles)
 
@@ -97,26 +92,30 @@ def main(stdscr):
                 ball = get_ball_x(tiles)
 
                 if paddle > ball:
-                    program.queue_input(-1)
+                    response = arcade.send(-1)
                 elif paddle < ball:
-                    program.queue_input(1)
+                    response = arcade.send(1)
                 else:
-                    program.queue_input(0)
+                    response = arcade.send(0)
 
             else:
                 capture_key = stdscr.getch()
 
                 if capture_key == curses.KEY_LEFT:
-                    program.queue_input(-1)
+                    response = arcade.send(-1)
                 elif capture_key == curses.KEY_RIGHT:
-                    program.queue_input(1)
+                    response = arcade.send(1)
                 else:
-                    program.queue_input(0)
+                    response = arcade.send(0)
 
-        except ProgramHalted:
-            process_frame(program, tiles)
+        elif response == IntcodeProgram.ExecutionStatus.HALTED:
+            process_frame(outputs, tiles)
             break
 
+        else:
+            outputs.append(response)
+            response = next(arcade)
+
     draw_screen(stdscr, tiles)
 
     stdscr.getch()
@@ -1,11 +1,13 @@
 #!/usr/bin/python3
 import curses
 import enum
-from collections import defaultdict
-from queue import Queue
+import os
+import sys
+from collections import deque
 
-from intcode import IntcodeProgram
-from exceptions import WaitingForInput, ProgramHalted
+# The shared Intcode package lives alongside the day directories
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from intcode import Channel, IntcodeProgram
 
 
 class Tile(enum.Enum):
@@ -84,12 +86,7 @@ class RepairDroid:
 
     def __init__(self):
         self.position = Point(0, 0)
-        self.movement = Movement.NORTH
         self.path_map = {self.position: Tile.TRAVERSABLE}
-        self.path_hits = defaultdict(int)
-        self.path_hits[self.position] += 1
-        self.backup = False
-        self.path_unseen = set()
 
     def get_grid_pos(self):
         return self.position.x, self.position.y
@@ -98,66 +95,36 @@ class RepairDroid:
     def at_o2_system(self):
         return self.path_map.get(self.position, Tile.UNKNOWN) == Tile.O2_SYSTEM
 
-    def _set_next_movement(self):
-        possible_movements = []
-        movement_updated = False
-
-        for direction, movement in [('one_north', Movement.NORTH),
-                                    ('one_east', Movement.EAST),
-                                    ('one_south', Movement.SOUTH),
-                                    ('one_west', Movement.WEST)]:
-            direction_method = getattr(self.position, direction)
-            direction_point = direction_method()
-            direction_tile = self.path_map.get(direction_point, Tile.UNKNOWN)
-
-            if direction_tile == Tile.UNKNOWN and not movement_updated:
-                self.movement = movement
-                movement_updated = True
-
-            elif direction_tile == Tile.UNKNOWN:
-                self.backup = True
-
-            if direction_tile != Tile.WALL:
-                possible_movements.append((movement, self.path_hits[direction_point]))
-
-        if not movement_updated:
-            self.movement = min(possible_movements, key=lambda x: x[1])[0]
-
-    def process_program_outcome(self, program):
-        outcome = program.get_output()
-
-        if self.movement == Movement.NORTH:
-            outcome_position = self.position.one_north()
-        elif self.movement == Movement.SOUTH:
-            outcome_position = self.position.one_south()
-        elif self.movement == Movement.EAST:
-            outcome_position = self.position.one_east()
-        elif self.movement == Movement.WEST:
-            outcome_position = self.position.one_west()
-        else:
-            raise Exception(f'Unknown Movement {self.movement}')
-
-        self.path_map[outcome_position] = Tile(outcome)
-        self.path_hits[self.position] += 1
-        self.path_unseen.discard(outcome_position)
-
-        if self.path_map[outcome_position] == Tile.WALL:
-            self.backup = False
-            self._set_next_movement()
-        else:
-            self.position = outcome_position
-
-            for neighbor in self.position.get_neighbors():
-                if neighbor not in self.path_map:
-                    self.path_unseen.add(neighbor)
-
-            if self.backup:
-                self.backup = False
-                self.movement = Movement.inverse(self.movement)
-            else:
-                self._set_next_movement()
-
-        program.queue_input(self.movement)
+    def survey(self, program):
+        """
+        Breadth first search of the whole area.  Rather than driving a single droid back and forth
+        along corridors it has already seen, the program is forked at every explored position and
+        each fork tries exactly one movement
+        """
+        frontier = deque([(self.position, program)])
+
+        while frontier:
+            position, position_program = frontier.popleft()
+
+            for direction, movement in [('one_north', Movement.NORTH),
+                                        ('one_east', Movement.EAST),
+                                        ('one_south', Movement.SOUTH),
+                                        ('one_west', Movement.WEST)]:
+                direction_point = getattr(position, direction)()
+                if direction_point in self.path_map:
+                    continue
+
+                droid_program = position_program.fork()
+                droid_program.queue_input(movement)
+                droid_program.run_until_io()
+
+                self.path_map[direction_point] = Tile(droid_program.get_output())
+
+                if self.path_map[direction_point] == Tile.O2_SYSTEM:
+                    self.position = direction_point
+
+                if self.path_map[direction_point] != Tile.WALL:
+                    frontier.append((direction_point, droid_program))
 
     def _get_bounding_box(self):
         x_min = min(self.path_map.keys(), key=lambda point: point.x).x
@@ -310,8 +277,8 @@ def main(stdscr):
     curses.init_pair(1, curses.COLOR_WHITE, curses.COLOR_BLACK)
     curses.init_pair(2, curses.COLOR_RED, curses.COLOR_BLACK)
 
-    input_queue = Queue()
-    output_queue = Queue()
+    input_queue = Channel()
+    output_queue = Channel()
 
     program = IntcodeProgram(io_scheme=IntcodeProgram.IOScheme.QUEUE,
                              input_queue=input_queue,
@@ -319,15 +286,7 @@ def main(stdscr):
     program.initialize_memory_from_file('input.txt')
 
     droid = RepairDroid()
-    program.queue_input(droid.movement)
-
-    while not droid.at_o2_system:
-        try:
-            program.execute_next()
-
-        except WaitingForInput:
-            droid.process_program_outcome(program)
-            droid.draw_map(stdscr)
+    droid.survey(program)
 
     o2_system = droid.position
 
@@ -339,17 +298,6 @@ def main(stdscr):
     droid.draw_map(stdscr, draw_path=shortest_path, message=f'Part One: {len(shortest_path) - 1}')
     stdscr.getch()
 
-    while droid.path_unseen:
-        try:
-            program.execute_next()
-
-        except WaitingForInput:
-            droid.process_program_outcome(program)
-            droid.draw_map(stdscr)
-
-    droid.draw_map(stdscr, message=f'end map')
-    stdscr.getch()
-
     all_paths = astar(droid.path_map, o2_system, Point(1000, 1000))
     max_depth = max(all_paths, key=lambda x: x.g)
 
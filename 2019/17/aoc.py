@@ -1,8 +1,10 @@
 #!/usr/bin/python3
-from queue import Queue, Empty
+import os
+import sys
 
-from intcode import IntcodeProgram
-from exceptions import WaitingForInput, ProgramHalted
+# The shared Intcode package lives alongside the day directories
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from intcode import AsciiChannel, Channel, IntcodeProgram
 
 
 class Point:
@@ -45,39 +47,25 @@ class Point:
 
 def build_scaffolding(program):
     scaffolding = set()
-    x = y = 0
-
-    while True:
-        try:
-            output = program.get_output(block=False)
-            character = chr(output)
-            print(character, end='')
 
+    for y, line in enumerate(AsciiChannel(program).read_until_prompt()):
+        print(line)
+        for x, character in enumerate(line):
             if character in ['#', '^', '>', 'v', '<']:
                 scaffolding.add(Point(x, y))
 
-            if output == 10:
-                x = 0
-                y += 1
-            else:
-                x += 1
-
-        except Empty:
-            print('Scaffold Complete')
-            break
+    print('Scaffold Complete')
 
     return scaffolding
 
 
-def draw_camera_image(image_data):
-    newline = image_data.index(10)
-    y = 0
-    while newline > 0:
-        line = image_data[:newline]
-        print(''.join([chr(x) for x in line]))
-        image_data = image_data[newline + 1:]
-        newline = image_data.index(10)
-        y += 1
+def draw_camera_image(lines):
+    """
+    Print the camera feed, whose frames are separated by blank lines
+    """
+    for line in lines:
+        if line:
+            print(line)
 
 
 def drive_around(program, draw=False):
@@ -100,44 +88,29 @@ def drive_around(program, draw=False):
     routine_c = 'R,4,L,12,L,12,R,6'
     visualize = 'n'
 
-    for input_data in [main_routine, routine_a, routine_b, routine_c, visualize]:
-        for character in input_data:
-            program.queue_input(ord(character))
-        program.queue_input(10)
-
-    image_data = []
-
-    while True:
-        try:
-            program.execute_next()
-            try:
-                output = program.get_output(block=False)
-                if output > 255:
-                    print(f'Part Two: {output}')
-                elif draw:
-                    image_data.append(output)
-                    if image_data[-1] == image_data[-2] == 10:
-                        draw_camera_image(image_data)
-                        image_data = []
-            except IndexError:
-                pass
-            except Empty:
-                pass
-
-        except ProgramHalted:
-            print('Program Complete')
-            break
+    ascii_channel = AsciiChannel(program)
+    ascii_channel.send_lines([main_routine, routine_a, routine_b, routine_c, visualize])
+
+    lines = ascii_channel.read_until_prompt()
+    if draw:
+        draw_camera_image(lines)
+
+    dust_collected = ascii_channel.read_value()
+    if dust_collected is not None:
+        print(f'Part Two: {dust_collected}')
+
+    if ascii_channel.halted():
+        print('Program Complete')
 
 
 def main():
-    input_queue = Queue()
-    output_queue = Queue()
+    input_queue = Channel()
+    output_queue = Channel()
     program = IntcodeProgram(io_scheme=IntcodeProgram.IOScheme.QUEUE,
                              input_queue=input_queue,
                              output_queue=output_queue)
     program.initialize_memory_from_file('input.txt')
     memory_dump = program.dump_memory()
-    program.run_to_end()
 
     scaffolding = build_scaffolding(program)
 
@@ -1,8 +1,12 @@
 #!/usr/bin/python3
-from queue import Queue, Empty
+import functools
+import os
+import sys
 
-from intcode import IntcodeProgram
-from exceptions import WaitingForInput, ProgramHalted
+# The shared Intcode package lives alongside the day directories
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from intcode import Channel, IntcodeProgram, Profiler
+from intcode.farm import IntcodeFarm
 
 
 class Point:
@@ -43,15 +47,15 @@ class Point:
         ]
 
 
-def run_get_output(program, memory_dump, x, y):
-    program.load_memory(memory_dump)
+def run_get_output(program, x, y):
+    program.reset()
     program.queue_input(x)
     program.queue_input(y)
     program.run_to_end()
     return program.get_output(block=False)
 
 
-def edge_detector(program, memory_dump, start=0, left_x=0, right_x=0, stop=50):
+def edge_detector(program, start=0, left_x=0, right_x=0, stop=50):
     """
     Find the edges of the tractor beam funnel.  Start on the outside and walk towards
     the known center of the beam until we have an affected drone (output == 1).  Capture
@@ -70,7 +74,7 @@ def edge_detector(program, memory_dump, start=0, left_x=0, right_x=0, stop=50):
         while True:
             if left_test > right_test:
                 break
-            output = run_get_output(program, memory_dump, left_test, y)
+            output = run_get_output(program, left_test, y)
             if first and y != 0 and output:
                 # We undershot, reset and try again
                 left_test = max(0, left_test - 2)
@@ -85,7 +89,7 @@ def edge_detector(program, memory_dump, start=0, left_x=0, right_x=0, stop=50):
         while True:
             if right_test < left_test:
                 break
-            output = run_get_output(program, memory_dump, right_test, y)
+            output = run_get_output(program, right_test, y)
             if first and y != 0 and output:
                 # We overshot, reset and try again
                 right_test += 2
@@ -100,8 +104,29 @@ def edge_detector(program, memory_dump, start=0, left_x=0, right_x=0, stop=50):
            sorted(set(right_edge_coordinates), key=lambda point: point.y)
 
 
-def part_one(program, memory_dump):
-    left_edge_coordinates, right_edge_coordinates = edge_detector(program, memory_dump)
+def batch_edge_scan(probe_all, rows):
+    """
+    Probe every point of rows, given as y: (first x, last x), in one batch rather than one drone at a
+    time, and return the left and right edges of each row the beam touches.  probe_all takes the
+    whole list of points and returns the outputs for each of them
+    """
+    points = [(x, y) for y, (first_x, last_x) in sorted(rows.items()) for x in range(first_x, last_x + 1)]
+    left_edges = {}
+    right_edges = {}
+    for (x, y), output in zip(points, probe_all(points)):
+        if output[0]:
+            left_edges[y] = min(x, left_edges.get(y, x))
+            right_edges[y] = max(x, right_edges.get(y, x))
+
+    return [Point(left_edges[y], y) for y in sorted(left_edges)], \
+           [Point(right_edges[y], y) for y in sorted(right_edges)]
+
+
+def part_one(program, probe_all=None):
+    if probe_all is not None:
+        left_edge_coordinates, right_edge_coordinates = batch_edge_scan(probe_all, {y: (0, 49) for y in range(50)})
+    else:
+        left_edge_coordinates, right_edge_coordinates = edge_detector(program)
     tractor_beam_effect = 0
 
     assert len(left_edge_coordinates) == len(right_edge_coordinates)
@@ -132,7 +157,7 @@ def best_fit_slope_and_intercept(edge_coordinates):
     return m, b
 
 
-def part_two(program, memory_dump, left_edge_coordinates, right_edge_coordinates):
+def part_two(program, left_edge_coordinates, right_edge_coordinates, probe_all=None):
     """
     Calculate best-fit lines for tractor beam edges.  Use those to guess where the beam will be wide enough
     to meet the acceptance criteria.  Do a full edge scan of the target area.  Calculate closest point.
@@ -152,11 +177,18 @@ def part_two(program, memory_dump, left_edge_coordinates, right_edge_coordinates
         y += 1
 
     # Best-fit lines gives us an estimate, extend our search range a little
-    left_edge_coordinates, right_edge_coordinates = edge_detector(program, memory_dump,
-                                                                  start=y - 50,
-                                                                  left_x=left_x,
-                                                                  right_x=right_x,
-                                                                  stop=y + 150)
+    if probe_all is not None:
+        rows = {
+            row: (max(0, int((row - left_edge_b) / left_edge_m) - 5), int((row - right_edge_b) / right_edge_m) + 5)
+            for row in range(y - 50, y + 150)
+        }
+        left_edge_coordinates, right_edge_coordinates = batch_edge_scan(probe_all, rows)
+    else:
+        left_edge_coordinates, right_edge_coordinates = edge_detector(program,
+                                                                      start=y - 50,
+                                                                      left_x=left_x,
+                                                                      right_x=right_x,
+                                                                      stop=y + 150)
 
     # There may be a couple squares that fit on the edges, find the closest
     squares = []
@@ -166,18 +198,39 @@ def part_two(program, memory_dump, left_edge_coordinates, right_edge_coordinates
     print(f'Part Two: {min(squares)}')
 
 
-def main():
-    input_queue = Queue()
-    output_queue = Queue()
+def main(profile=False, lockstep=False, parallel=False):
+    input_queue = Channel()
+    output_queue = Channel()
+    profiler = Profiler() if profile else None
     program = IntcodeProgram(io_scheme=IntcodeProgram.IOScheme.QUEUE,
                              input_queue=input_queue,
-                             output_queue=output_queue)
+                             output_queue=output_queue,
+                             profiler=profiler)
     program.initialize_memory_from_file('input.txt')
-    memory_dump = program.dump_memory()
 
-    left_edge_coordinates, right_edge_coordinates = part_one(program, memory_dump)
-    part_two(program, memory_dump, left_edge_coordinates, right_edge_coordinates)
+    # Batched scans probe whole rows at once, either in lockstep lanes or across worker processes
+    farm = None
+    probe_all = None
+    if lockstep:
+        # NumPy is only needed when scanning in lockstep
+        from intcode.lockstep import LockstepProgram
+        probe_all = functools.partial(LockstepProgram.map, program)
+    elif parallel:
+        farm = IntcodeFarm(program)
+        probe_all = functools.partial(farm.map, chunksize=256)
+
+    try:
+        left_edge_coordinates, right_edge_coordinates = part_one(program, probe_all)
+        part_two(program, left_edge_coordinates, right_edge_coordinates, probe_all)
+    finally:
+        if farm is not None:
+            farm.close()
+
+    if profiler is not None:
+        print(profiler.report())
+        profiler.to_json('profile.json')
 
 
 if __name__ == '__main__':
-    main()
+    main(profile='--profile' in sys.argv, lockstep='--lockstep' in sys.argv,
+         parallel='--parallel' in sys.argv)
@@ -1,24 +1,20 @@
 #!/usr/bin/python3
-from queue import Queue, Empty
+import os
+import sys
 
-from intcode import IntcodeProgram
-from exceptions import WaitingForInput, ProgramHalted
+# The shared Intcode package lives alongside the day directories
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from intcode import AsciiChannel, Channel, IntcodeProgram, Profiler
+from intcode.farm import IntcodeFarm
 
 
-def draw_output(program):
-    while True:
-        try:
-            output = program.get_output(block=False)
-            try:
-                character = chr(output)
-                print(character, end='')
-            except ValueError:
-                return output
-        except Empty:
-            break
+def draw_output(outputs):
+    text, values = AsciiChannel.decode(outputs)
+    print(text, end='')
+    return values[0] if values else None
 
 
-def survey_hull(program, memory_dump, run=False):
+def build_springscript(run=False):
     if not run:
         springscript = [
             'NOT A J',
@@ -43,36 +39,61 @@ def survey_hull(program, memory_dump, run=False):
             'AND T J',
             'RUN'
         ]
+    return springscript
+
 
-    for spring_instruction in springscript:
-        for character in spring_instruction:
-            program.queue_input(ord(character))
-        program.queue_input(10)
+def encode_springscript(springscript):
+    return list('\n'.join(springscript + ['']).encode('ascii'))
 
-    try:
-        program.load_memory(memory_dump)
-        program.run_to_end()
 
-    except ProgramHalted:
-        print('Program Complete')
+def survey_hull(program, memory_dump, run=False):
+    springscript = build_springscript(run)
+    program.load_memory(memory_dump)
 
-    hull_damage = draw_output(program)
+    ascii_channel = AsciiChannel(program)
+    ascii_channel.send_lines(springscript)
+    for line in ascii_channel.read_until_prompt():
+        print(line)
+
+    hull_damage = ascii_channel.read_value()
 
     print(f'Action {springscript[-1]}: {hull_damage}')
 
 
-def main():
-    input_queue = Queue()
-    output_queue = Queue()
+def survey_hull_in_parallel(program, processes=None):
+    """
+    Try every springscript at once, one per worker process of an IntcodeFarm
+    """
+    springscripts = [build_springscript(), build_springscript(run=True)]
+
+    with IntcodeFarm(program, processes) as farm:
+        jobs = (encode_springscript(springscript) for springscript in springscripts)
+        for springscript, outputs in zip(springscripts, farm.imap(jobs, chunksize=1)):
+            hull_damage = draw_output(outputs)
+            print(f'Action {springscript[-1]}: {hull_damage}')
+
+
+def main(profile=False, parallel=False):
+    input_queue = Channel()
+    output_queue = Channel()
+    profiler = Profiler() if profile else None
     program = IntcodeProgram(io_scheme=IntcodeProgram.IOScheme.QUEUE,
                              input_queue=input_queue,
-                             output_queue=output_queue)
+                             output_queue=output_queue,
+                             profiler=profiler)
     program.initialize_memory_from_file('input.txt')
     memory_dump = program.dump_memory()
 
-    survey_hull(program, memory_dump)
-    survey_hull(program, memory_dump, run=True)
+    if parallel:
+        survey_hull_in_parallel(program)
+    else:
+        survey_hull(program, memory_dump)
+        survey_hull(program, memory_dump, run=True)
+
+    if profiler is not None:
+        print(profiler.report())
+        profiler.to_json('profile.json')
 
 
 if __name__ == '__main__':
-    main()
+    main(profile='--profile' in sys.argv, parallel='--parallel' in sys.argv)
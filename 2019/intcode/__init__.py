@@ -0,0 +1,14 @@
+"""
+The Intcode virtual machine shared by every 2019 day.  IntcodeProgram runs a program on any of its
+engines (the interpreter, the block compiler or ahead-of-time transpiled modules) behind the same
+interface.  Modules with heavier imports are left to be imported on their own: intcode.farm for
+multiprocess jobs, intcode.lockstep for NumPy lanes, intcode.transpiler and intcode.benchmark.
+Programs are transpiled ahead of time with python ../intcode compile input.txt from a day directory
+"""
+from .channel import AsciiChannel, Channel
+from .exceptions import InvalidOpCode, InvalidParameterMode, ProgramHalted, WaitingForInput
+from .memory import IntcodeMemory, MemoryImage
+from .profiler import Profiler
+from .program import IntcodeProgram
+from .scheduler import Scheduler
+from .watchpoints import WatchpointDiscovery
@@ -0,0 +1,17 @@
+"""
+Command line for the Intcode package.  From a day directory, where its input.txt lives:
+
+    python ../intcode compile input.txt [--cache-dir DIR]
+
+or from the 2019 directory, python -m intcode compile 09/input.txt
+"""
+import os
+import sys
+
+# Run as a directory the package isn't on the path yet, so put its parent there as the day scripts do
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from intcode.transpiler import main
+
+
+if __name__ == '__main__':
+    main(prog='intcode')
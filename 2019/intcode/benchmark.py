@@ -0,0 +1,179 @@
+import argparse
+import json
+import os
+import sys
+import time
+from .exceptions import WaitingForInput
+from .program import IntcodeProgram
+
+
+# Day directories sit next to the package
+DAYS_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+ENGINES = {
+    'interpreter': IntcodeProgram.Engine.INTERPRETER,
+    'compiler': IntcodeProgram.Engine.BLOCK_COMPILER,
+    'transpiled': IntcodeProgram.Engine.TRANSPILED,
+}
+
+WALK_SPRINGSCRIPT = ['NOT A J', 'NOT B T', 'OR T J', 'NOT C T', 'OR T J', 'AND D J', 'WALK']
+
+
+class Workload:
+    """
+    A fixed run of one day's program: each entry in runs is the input for one run from a fresh
+    reset, patches are memory writes made before every run and a program starved of input is fed
+    fill instead, when given.  Programs that never halt, such as day 15's droid, are run with halts
+    False and end a run once they have used up its input
+    """
+
+    def __init__(self, day, runs=((),), patches=None, fill=None, halts=True):
+        self.day = day
+        self.runs = [list(inputs) for inputs in runs]
+        self.patches = patches if patches is not None else {}
+        self.fill = fill
+        self.halts = halts
+
+    @property
+    def file_name(self):
+        return os.path.join(DAYS_DIRECTORY, self.day, 'input.txt')
+
+    def build(self, engine, tracer=None):
+        program = IntcodeProgram(io_scheme=IntcodeProgram.IOScheme.QUEUE, engine=engine, tracer=tracer)
+        program.initialize_memory_from_file(self.file_name)
+        return program
+
+    def run(self, program):
+        for inputs in self.runs:
+            program.reset()
+            for address, value in self.patches.items():
+                program.set_memory_address(address, value)
+            program.queue_inputs(inputs)
+
+            status = program.run_until_io()
+            while status != IntcodeProgram.ExecutionStatus.HALTED:
+                if status == IntcodeProgram.ExecutionStatus.NEEDS_INPUT:
+                    if self.fill is None and not self.halts:
+                        break
+                    if self.fill is None:
+                        raise WaitingForInput()
+                    program.queue_input(self.fill)
+                elif status == IntcodeProgram.ExecutionStatus.OUTPUT_READY:
+                    program.drain_output()
+                status = program.run_until_io()
+            program.drain_output()
+
+
+# Days whose programs finish in a few hundred instructions are run enough times to be measurable
+WORKLOADS = {
+    '02': Workload('02', runs=[()] * 2000, patches={1: 12, 2: 2}),
+    '05': Workload('05', runs=[[5]] * 500),
+    '07': Workload('07', runs=[[phase, 0] for phase in range(5)] * 1000),
+    '09': Workload('09', runs=[[2]]),
+    '11': Workload('11', fill=0),
+    '13': Workload('13'),
+    '15': Workload('15', runs=[[1, 1, 4, 4, 2, 2, 3, 3, 1, 4, 2, 3] * 50], halts=False),
+    '17': Workload('17'),
+    '19': Workload('19', runs=[[x, y] for y in range(20) for x in range(20)]),
+    '21': Workload('21', runs=[list('\n'.join(WALK_SPRINGSCRIPT + ['']).encode('ascii'))]),
+}
+
+
+def count_instructions(workload):
+    """
+    Instructions the workload executes.  A traced program runs one unfused instruction at a time,
+    so the count is the same whichever engine is timed
+    """
+    count = 0
+
+    def tracer(opcode, pointer, operands, target):
+        nonlocal count
+        count += 1
+
+    workload.run(workload.build(IntcodeProgram.Engine.INTERPRETER, tracer=tracer))
+    return count
+
+
+def time_workload(workload, engine, repeat=3):
+    """
+    Best wall clock time of repeat runs on one program, so compiled blocks are only built by the
+    first of them.  Loading the program isn't timed
+    """
+    program = workload.build(engine)
+
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        workload.run(program)
+        elapsed = time.perf_counter() - started
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def benchmark(days, engines, repeat=3):
+    results = {}
+    for day in days:
+        workload = WORKLOADS[day]
+        instructions = count_instructions(workload)
+        results[day] = {}
+        for engine_name in engines:
+            elapsed = time_workload(workload, ENGINES[engine_name], repeat)
+            results[day][engine_name] = {
+                'instructions': instructions,
+                'seconds': elapsed,
+                'rate': instructions / elapsed if elapsed else 0.0,
+            }
+            print(f'Day {day} {engine_name:<12} {instructions:>12,} instructions {elapsed:>9.4f}s '
+                  f'{results[day][engine_name]["rate"]:>14,.0f} instructions/s')
+    return results
+
+
+def find_regressions(results, baseline, tolerance=0.1):
+    """
+    (day, engine, rate, baseline rate) for every result more than tolerance slower than the same
+    day and engine in baseline
+    """
+    regressions = []
+    for day, engines in results.items():
+        for engine_name, result in engines.items():
+            if engine_name not in baseline.get(day, {}):
+                continue
+            baseline_rate = baseline[day][engine_name]['rate']
+            if result['rate'] < baseline_rate * (1 - tolerance):
+                regressions.append((day, engine_name, result['rate'], baseline_rate))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m intcode.benchmark',
+                                     description="Instructions per second for each day's program on each engine")
+    parser.add_argument('--days', nargs='+', choices=sorted(WORKLOADS), default=sorted(WORKLOADS))
+    parser.add_argument('--engines', nargs='+', choices=list(ENGINES), default=list(ENGINES))
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per engine, the best is reported')
+    parser.add_argument('--json', help='Write the results to this file')
+    parser.add_argument('--compare', help='Results file from an earlier --json run to check against')
+    parser.add_argument('--tolerance', type=float, default=0.1,
+                        help='Slowdown against --compare results reported as a regression')
+    args = parser.parse_args()
+
+    results = benchmark(args.days, args.engines, args.repeat)
+
+    if args.json:
+        with open(args.json, 'w') as output:
+            json.dump(results, output, indent=2)
+
+    if args.compare:
+        with open(args.compare, 'r') as baseline_file:
+            baseline = json.load(baseline_file)
+
+        regressions = find_regressions(results, baseline, args.tolerance)
+        for day, engine_name, rate, baseline_rate in regressions:
+            print(f'Regression: day {day} {engine_name} {rate:,.0f} instructions/s, '
+                  f'was {baseline_rate:,.0f}')
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+from collections import deque
+from queue import Empty
+
+
+class Channel:
+    """
+    Lock-free FIFO for passing values in and out of a single threaded IntcodeProgram.  It answers
+    the same put/get calls as queue.Queue, so a program can use either, and adds bulk operations
+    for feeding and draining many values at once
+    """
+
+    def __init__(self, values=()):
+        self.queue = deque(values)
+
+    def __len__(self):
+        return len(self.queue)
+
+    def put(self, value, block=True):
+        self.queue.append(value)
+
+    def get(self, block=True):
+        # Nothing else can fill the channel while we wait, so never block
+        try:
+            return self.queue.popleft()
+        except IndexError:
+            raise Empty
+
+    def empty(self):
+        return not self.queue
+
+    def qsize(self):
+        return len(self.queue)
+
+    def feed_many(self, values):
+        self.queue.extend(values)
+
+    def drain(self):
+        values = list(self.queue)
+        self.queue.clear()
+        return values
+
+
+class AsciiChannel:
+    """
+    Text framing for an ASCII driven IntcodeProgram.  Lines go in whole with send_line and come
+    back decoded a prompt at a time, with all the output waiting decoded in one go rather than a
+    character at a time.  Output that isn't ASCII, such as the answer a program finishes with, is
+    kept apart for read_value
+    """
+
+    def __init__(self, program):
+        self.program = program
+        self.status = None
+        self.values = []
+
+    @staticmethod
+    def decode(values):
+        """
+        Split raw output in to the text it spells out and the values that aren't ASCII
+        """
+        if not values or (min(values) >= 0 and max(values) < 128):
+            return bytes(values).decode('ascii'), []
+        text = bytes([value for value in values if 0 <= value < 128]).decode('ascii')
+        return text, [value for value in values if not 0 <= value < 128]
+
+    def send_line(self, line):
+        self.program.queue_inputs(f'{line}\n'.encode('ascii'))
+
+    def send_lines(self, lines):
+        self.program.queue_inputs('\n'.join(list(lines) + ['']).encode('ascii'))
+
+    def read_until_prompt(self):
+        """
+        Run the program until it waits for input or halts and return the lines it printed on the
+        way, the last without a newline should the prompt not end in one
+        """
+        status = self.program.run_until_io()
+        while status == self.program.ExecutionStatus.OUTPUT_READY:
+            status = self.program.run_until_io()
+        self.status = status
+
+        text, values = AsciiChannel.decode(self.program.drain_output())
+        self.values.extend(values)
+        lines = text.split('\n')
+        if lines[-1] == '':
+            lines.pop()
+        return lines
+
+    def read_value(self):
+        """
+        The oldest output that wasn't ASCII, or None if there hasn't been one
+        """
+        return self.values.pop(0) if self.values else None
+
+    def halted(self):
+        return self.status == self.program.ExecutionStatus.HALTED
@@ -0,0 +1,294 @@
+from collections import defaultdict
+from queue import Empty
+from .exceptions import InvalidOpCode, InvalidParameterMode
+from .instruction import CompareBranchInstruction, MoveInstruction
+from .memory import IntcodeMemory
+
+
+class CompiledBlock:
+    """
+    A run of straight-line instructions translated in to a single Python function.  source holds the
+    cells the block was compiled from, so end is one past the last of them.  A block with no function
+    marks an instruction (I/O or halt) that is run on its own
+    """
+
+    __slots__ = ('start', 'end', 'source', 'function')
+
+    def __init__(self, start, source, function):
+        self.start = start
+        self.end = start + len(source)
+        self.source = tuple(source)
+        self.function = function
+
+
+class BlockCompiler:
+    """
+    Execution engine that finds basic blocks in the program image and translates each one in to a
+    generated Python function, with parameter modes resolved and memory access inlined at compile
+    time.  A block ends on a jump, or just before I/O or a halt, which are run one at a time.
+    Blocks are cached in program memory by start address and dropped when a write lands inside them.
+    Code that keeps being written over, such as a loop patching its own operands, is only compiled
+    MAX_COMPILES times before it is left to the interpreter
+    """
+
+    MAX_BLOCK_INSTRUCTIONS = 64
+    MAX_COMPILES = 4
+
+    # Opcodes, including superinstructions, that store to their third parameter or may jump
+    WRITES = (1, 2, 7, 8) + MoveInstruction.OPCODES + CompareBranchInstruction.OPCODES
+    BRANCHES = (5, 6) + CompareBranchInstruction.OPCODES
+
+    # Generated functions are shared by every program that compiles identical source
+    _functions = {}
+
+    def __init__(self, program, compile_on_miss=True):
+        self.program = program
+        # Without it, addresses with no cached block are interpreted up to the next branch to a block
+        self.compile_on_miss = compile_on_miss
+        self._compile_counts = defaultdict(int)
+
+    def run_until_io(self):
+        program = self.program
+        memory = program._memory
+        block_cache = memory.block_cache
+        pointer = program._next_instruction
+        relative_base = program._relative_base_offset
+        input_queue = program._input_queue
+        output_queue = program._output_queue
+        profiler = program._profiler
+
+        try:
+            while True:
+                block = block_cache.get(pointer)
+                if block is None:
+                    if not self.compile_on_miss or self._compile_counts[pointer] >= BlockCompiler.MAX_COMPILES:
+                        # Code with no block, such as I/O or a block that was written over, is
+                        # interpreted until a branch lands back on a block
+                        program._next_instruction = pointer
+                        program._relative_base_offset = relative_base
+                        status = program._interpret_until_io(stop_at=block_cache)
+                        pointer = program._next_instruction
+                        relative_base = program._relative_base_offset
+                        if status != program.ExecutionStatus.RUNNING:
+                            return status
+                        continue
+                    block = self.compile_block(pointer)
+
+                if block.function is not None:
+                    if profiler is not None:
+                        profiler.block_counts[block] += 1
+                    pointer, relative_base = block.function(memory, memory.pages, relative_base)
+                    continue
+                if profiler is not None:
+                    profiler.address_counts[pointer] += 1
+
+                # I/O and halts are run here, the same way the interpreter runs them
+                instruction, parameter_modes, _ = program.decode_instruction(pointer)
+                if instruction.opcode == 3:
+                    target = memory[pointer + 1]
+                    if parameter_modes[0] == 2:
+                        target += relative_base
+                    if input_queue is not None:
+                        try:
+                            memory[target] = input_queue.get(block=False)
+                        except Empty:
+                            if profiler is not None:
+                                # Not run until its input arrives, as in step()
+                                profiler.address_counts[pointer] -= 1
+                            return program.ExecutionStatus.NEEDS_INPUT
+                    else:
+                        memory[target] = int(input(program._input_prompt))
+                    pointer += 2
+
+                elif instruction.opcode == 4:
+                    value = memory[pointer + 1]
+                    if parameter_modes[0] != 1:
+                        if parameter_modes[0] == 2:
+                            value += relative_base
+                        value = memory[value]
+                    if output_queue is not None:
+                        output_queue.put(value)
+                    else:
+                        print(program._output_format.format(value))
+                    pointer += 2
+                    return program.ExecutionStatus.OUTPUT_READY
+
+                elif instruction.opcode == 99:
+                    if profiler is not None:
+                        # A halt is where the program stops, not an instruction it runs, as in step()
+                        profiler.address_counts[pointer] -= 1
+                    return program.ExecutionStatus.HALTED
+
+                else:
+                    program._next_instruction = pointer
+                    program._relative_base_offset = relative_base
+                    status = program.step()
+                    pointer = program._next_instruction
+                    relative_base = program._relative_base_offset
+
+                    if status != program.ExecutionStatus.RUNNING:
+                        return status
+        finally:
+            program._next_instruction = pointer
+            program._relative_base_offset = relative_base
+
+    def compile_block(self, start):
+        memory = self.program._memory
+        instructions, end = self.decode_block(start)
+        self._compile_counts[start] += 1
+
+        if instructions:
+            block = CompiledBlock(start, [memory[cell] for cell in range(start, end)],
+                                  self._compile(BlockCompiler.generate_source(start, end, instructions)))
+        else:
+            block = CompiledBlock(start, [memory[start]], None)
+
+        memory.add_block(block)
+        return block
+
+    def decode_block(self, start):
+        """
+        Decode the basic block starting at start and return its instructions, as (address, opcode,
+        parameter modes, operands) tuples, along with the address just past the last of them
+        """
+        memory = self.program._memory
+        instructions = []
+        literal_targets = set()
+        address = start
+
+        while len(instructions) < BlockCompiler.MAX_BLOCK_INSTRUCTIONS:
+            try:
+                instruction, parameter_modes, parameter_count = self.program.decode_instruction(address)
+            except (InvalidOpCode, InvalidParameterMode):
+                break
+            if instruction.opcode in (3, 4, 99):
+                break
+            # An earlier instruction in the block overwrites this one, so it can't be compiled ahead
+            if any(cell in literal_targets for cell in range(address, address + parameter_count + 1)):
+                break
+
+            operands = [memory[address + index + 1] for index in range(0, parameter_count)]
+            instructions.append((address, instruction.opcode, parameter_modes, operands))
+            if instruction.opcode in BlockCompiler.WRITES and parameter_modes[2] != 2:
+                literal_targets.add(operands[2])
+
+            address += parameter_count + 1
+            if instruction.opcode in BlockCompiler.BRANCHES:
+                break
+
+        return instructions, address
+
+    @staticmethod
+    def generate_source(start, end, instructions, name='block'):
+        """
+        Python source for a function called name that runs the decoded block and returns the next
+        instruction pointer and relative base
+        """
+        lines = [
+            f'def {name}(memory, pages, relative_base):',
+            '    size = memory.size',
+            '    plain_pages = memory.plain_pages',
+        ]
+
+        for address, opcode, parameter_modes, operands in instructions:
+            next_address = address + len(operands) + 1
+            lines.append(f'    # {address}: {opcode} {operands} {parameter_modes}')
+
+            if opcode in (1, 2, 7, 8):
+                first = BlockCompiler._read(operands[0], parameter_modes[0])
+                second = BlockCompiler._read(operands[1], parameter_modes[1])
+                expression = {
+                    1: f'{first} + {second}',
+                    2: f'{first} * {second}',
+                    7: f'1 if {first} < {second} else 0',
+                    8: f'1 if {first} == {second} else 0',
+                }[opcode]
+                lines.extend(BlockCompiler._write(operands[2], parameter_modes[2], expression,
+                                                  start, end, next_address))
+
+            elif opcode in MoveInstruction.OPCODES:
+                source_index = 0 if opcode == 110 else 1
+                value = BlockCompiler._read(operands[source_index], parameter_modes[source_index])
+                lines.extend(BlockCompiler._write(operands[2], parameter_modes[2], value, start, end, next_address))
+
+            elif opcode in CompareBranchInstruction.OPCODES:
+                first = BlockCompiler._read(operands[0], parameter_modes[0])
+                second = BlockCompiler._read(operands[1], parameter_modes[1])
+                if parameter_modes[2] == 0 and operands[2] == address + 6:
+                    # The store lands on the jump's own destination, so that is the flag
+                    destination = {0: 'memory[flag]', 1: 'flag', 2: 'memory[relative_base + flag]'}[parameter_modes[5]]
+                else:
+                    destination = BlockCompiler._read(operands[5], parameter_modes[5])
+                lines.append(f'    flag = 1 if {first} {"<" if opcode < 180 else "=="} {second} else 0')
+                # Should the store land on the jump, carry on from the jump instead of the fused branch
+                lines.extend(BlockCompiler._write(operands[2], parameter_modes[2], 'flag', start, end, address + 4))
+                lines.append(f'    if flag {"!=" if opcode & 1 else "=="} 0:')
+                lines.append(f'        return {destination}, relative_base')
+
+            elif opcode in (5, 6):
+                value = BlockCompiler._read(operands[0], parameter_modes[0])
+                destination = BlockCompiler._read(operands[1], parameter_modes[1])
+                lines.append(f'    if {value} {"!=" if opcode == 5 else "=="} 0:')
+                lines.append(f'        return {destination}, relative_base')
+
+            elif opcode == 9:
+                lines.append(f'    relative_base += {BlockCompiler._read(operands[0], parameter_modes[0])}')
+
+        lines.append(f'    return {end}, relative_base')
+        return '\n'.join(lines)
+
+    @staticmethod
+    def _compile(source):
+        if source not in BlockCompiler._functions:
+            namespace = {}
+            exec(source, namespace)
+            BlockCompiler._functions[source] = namespace['block']
+        return BlockCompiler._functions[source]
+
+    @staticmethod
+    def _read(value, mode):
+        page_bits = IntcodeMemory.PAGE_BITS
+        page_mask = IntcodeMemory.PAGE_MASK
+
+        if mode == 1:
+            return f'({value})'
+        if mode == 0:
+            if value < 0:
+                return f'memory[{value}]'
+            return f'(pages[{value >> page_bits}][{value & page_mask}] if {value} < size else memory[{value}])'
+        return f'(pages[address >> {page_bits}][address & {page_mask}] ' \
+               f'if 0 <= (address := relative_base + {value}) < size else memory[address])'
+
+    @staticmethod
+    def _write(value, mode, expression, start, end, next_address):
+        # Pages with nothing cached or watched on them are written straight in to, see IntcodeMemory
+        page_bits = IntcodeMemory.PAGE_BITS
+        page_mask = IntcodeMemory.PAGE_MASK
+
+        if mode != 2:
+            if value < 0:
+                return [f'    memory[{value}] = {expression}']
+            return [
+                f'    result = {expression}',
+                f'    if {value} < size and plain_pages[{value >> page_bits}]:',
+                f'        pages[{value >> page_bits}][{value & page_mask}] = result',
+                f'    else:',
+                f'        memory[{value}] = result',
+                f'        if {value} >= size:',
+                f'            size = memory.size',
+            ]
+
+        # A relative write may land on this very block, in which case the rest of it is stale.  The
+        # block's own page never takes the plain path, so only the other path has to check
+        return [
+            f'    target = relative_base + {value}',
+            f'    result = {expression}',
+            f'    if 0 <= target < size and plain_pages[target >> {page_bits}]:',
+            f'        pages[target >> {page_bits}][target & {page_mask}] = result',
+            f'    else:',
+            f'        memory[target] = result',
+            f'        if target >= size:',
+            f'            size = memory.size',
+            f'        if {start} <= target < {end}:',
+            f'            return {next_address}, relative_base',
+        ]
@@ -0,0 +1,85 @@
+from array import array
+from multiprocessing import Pool, shared_memory
+from .channel import Channel
+from .exceptions import InvalidOpCode, InvalidParameterMode
+from .memory import MemoryImage
+from .program import IntcodeProgram
+from .scheduler import Scheduler
+
+
+# Per worker process program, set up once from the shared image by _initialize_worker
+_worker_program = None
+
+
+def _initialize_worker(shared_name, cell_count, sparse):
+    global _worker_program
+
+    shared = shared_memory.SharedMemory(name=shared_name)
+    cells = array('q')
+    cells.frombytes(shared.buf[:cell_count * cells.itemsize])
+    shared.close()
+
+    _worker_program = IntcodeProgram(io_scheme=IntcodeProgram.IOScheme.QUEUE,
+                                     input_queue=Channel(),
+                                     output_queue=Channel())
+    _worker_program.load_memory(MemoryImage(cells, sparse))
+
+
+def _run_job(inputs):
+    """
+    Outputs of one run on inputs.  Intcode errors derive from BaseException, which a pool worker
+    does not survive, so they are raised again as an Exception the pool hands back to the caller
+    """
+    _worker_program.reset()
+    _worker_program.queue_inputs(inputs)
+    try:
+        halted = Scheduler.run_until_blocked(_worker_program)
+    except (InvalidOpCode, InvalidParameterMode) as exc:
+        raise Exception(f'Job {list(inputs)} failed: {exc}')
+    if not halted:
+        raise Exception(f'Job {list(inputs)} ran out of input before halting')
+    return _worker_program.drain_output()
+
+
+class IntcodeFarm:
+    """
+    Pool of worker processes for running one Intcode program many times over, each job being the
+    input values for one independent run from the program's current memory.  The memory image is
+    put in shared memory once, so workers never parse the program themselves, and results stream
+    back in job order as each one finishes
+    """
+
+    def __init__(self, program, processes=None):
+        image = program.dump_memory()
+        if not isinstance(image.cells, array):
+            raise Exception('IntcodeFarm needs every memory cell to fit in 64 bits')
+
+        cell_bytes = image.cells.tobytes()
+        self._shared = shared_memory.SharedMemory(create=True, size=max(1, len(cell_bytes)))
+        self._shared.buf[:len(cell_bytes)] = cell_bytes
+        self._pool = Pool(processes, initializer=_initialize_worker,
+                          initargs=(self._shared.name, len(image.cells), image.sparse))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def imap(self, jobs, chunksize=16):
+        """
+        Outputs of every job in jobs, an iterable of input value sequences, yielded in job order.
+        A job that runs out of input or hits an invalid instruction raises an Exception here
+        """
+        return self._pool.imap(_run_job, jobs, chunksize)
+
+    def map(self, jobs, chunksize=16):
+        return list(self.imap(jobs, chunksize))
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+            self._shared.close()
+            self._shared.unlink()
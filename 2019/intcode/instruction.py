@@ -1,6 +1,6 @@
 #!/usr/bin/python3
-from queue import Queue, Empty
-from exceptions import InvalidOpCode, InvalidParameterMode, ProgramHalted, WaitingForInput
+from queue import Empty
+from .exceptions import InvalidOpCode, InvalidParameterMode, ProgramHalted, WaitingForInput
 
 
 class Instruction:
@@ -17,6 +17,8 @@ class Instruction:
     def __init__(self, opcode, parameter_count):
         self.opcode = opcode
         self.parameter_count = parameter_count
+        # Superinstructions are only ever installed by the peephole pass, never decoded from memory
+        self.superinstruction = False
         self.parameter_return_type = [Instruction.ParameterReturnType.INTERPRET for _ in range(0, parameter_count)]
 
     def __eq__(self, other):
@@ -61,24 +63,18 @@ class Instruction:
         return parameter_values
 
     def parse_extended_opcode(self, extended_opcode):
-        if extended_opcode < 100:
-            return [0 for _ in range(0, self.parameter_count)]
-        # Default parameter mode is 0 for each parameter, if not provided
-        extended_opcode = '0' * self.parameter_count + str(extended_opcode)
-
-        # Remove the opcode from the parameters
-        extended_opcode = extended_opcode[:-2]
-
-        # ParameterMode modes are RtL
-        extended_opcode = extended_opcode[::-1]
-
-        # Don't return excess default modes
-        extended_opcode = extended_opcode[:self.parameter_count]
-
-        return [int(x) for x in extended_opcode]
-
-    def execute(self, context):
-        parameter_modes = self.parse_extended_opcode(context.extended_opcode)
+        # ParameterMode modes are RtL, starting at the hundreds digit; missing modes default to 0
+        parameter_modes = []
+        extended_opcode //= 100
+        for _ in range(0, self.parameter_count):
+            extended_opcode, mode = divmod(extended_opcode, 10)
+            parameter_modes.append(mode)
+
+        return parameter_modes
+
+    def prepare(self, context, parameter_modes=None):
+        if parameter_modes is None:
+            parameter_modes = self.parse_extended_opcode(context.extended_opcode)
         context.instruction_parameters = []
         if self.parameter_count >= 1:
             for index in range(0, self.parameter_count):
@@ -86,9 +82,9 @@ class Instruction:
                     'value': context.program_memory[context.execution_pointer + index + 1],
                     'mode': parameter_modes[index],
                 })
-        if context.debug:
-            print(f'Executing {self.__class__.__name__} with {context.instruction_parameters}')
 
+    def execute(self, context, parameter_modes=None):
+        self.prepare(context, parameter_modes)
         self.method(context)
 
 
@@ -101,8 +97,6 @@ class AddInstruction(Instruction):
     def method(self, context):
         parameter_values = self.get_parameter_values(context)
         context.program_memory[parameter_values[2]] = parameter_values[0] + parameter_values[1]
-        if context.debug:
-            print(f'Put {context.program_memory[parameter_values[2]]} in to {parameter_values[2]}')
         self.update_execution_pointer(context)
 
 
@@ -115,8 +109,6 @@ class MultiplyInstruction(Instruction):
     def method(self, context):
         parameter_values = self.get_parameter_values(context)
         context.program_memory[parameter_values[2]] = parameter_values[0] * parameter_values[1]
-        if context.debug:
-            print(f'Put {context.program_memory[parameter_values[2]]} in to {parameter_values[2]}')
         self.update_execution_pointer(context)
 
 
@@ -128,15 +120,13 @@ class StoreInputInstruction(Instruction):
 
     def method(self, context):
         parameter_values = self.get_parameter_values(context)
-        if context.input_queue:
+        if context.input_queue is not None:
             try:
                 context.program_memory[parameter_values[0]] = context.input_queue.get(block=False)
             except Empty:
                 raise WaitingForInput()
         else:
-            context.program_memory[parameter_values[0]] = int(input(f'BOOST needs input: '))
-        if context.debug:
-            print(f'Put {context.program_memory[parameter_values[0]]} in to {parameter_values[0]}')
+            context.program_memory[parameter_values[0]] = int(input(context.input_prompt))
         self.update_execution_pointer(context)
 
 
@@ -147,10 +137,10 @@ class OutputInstruction(Instruction):
 
     def method(self, context):
         parameter_values = self.get_parameter_values(context)
-        if context.output_queue:
+        if context.output_queue is not None:
             context.output_queue.put(parameter_values[0])
         else:
-            print(f'[DIAGNOSTIC] {parameter_values[0]}')
+            print(context.output_format.format(parameter_values[0]))
         self.update_execution_pointer(context)
 
 
@@ -161,8 +151,6 @@ class JmpNEZInstruction(Instruction):
 
     def method(self, context):
         parameter_values = self.get_parameter_values(context)
-        if context.debug:
-            print(f'Jumping to {parameter_values[1]} if {parameter_values[0]} != 0')
         if parameter_values[0] != 0:
             context.execution_pointer = parameter_values[1]
         else:
@@ -176,14 +164,70 @@ class JmpEQZInstruction(Instruction):
 
     def method(self, context):
         parameter_values = self.get_parameter_values(context)
-        if context.debug:
-            print(f'Jumping to {parameter_values[1]} if {parameter_values[0]} == 0')
         if parameter_values[0] == 0:
             context.execution_pointer = parameter_values[1]
         else:
             self.update_execution_pointer(context)
 
 
+class CompareBranchInstruction(Instruction):
+    """
+    Superinstruction for a LessThan or EqualTo in to a temporary followed directly by a JmpNEZ or
+    JmpEQZ on that temporary.  Its parameters are the compare's three, the jump's opcode cell and the
+    jump's two.  The temporary is still stored, so later reads of it are unaffected, but the branch
+    is taken on the flag directly instead of reading it back
+    """
+
+    OPCODES = (175, 176, 185, 186)
+
+    def __init__(self, compare_opcode, jump_opcode):
+        super().__init__(100 + compare_opcode * 10 + jump_opcode, 6)
+        self.superinstruction = True
+        self.compare_opcode = compare_opcode
+        self.jump_opcode = jump_opcode
+        self.parameter_return_type[2] = Instruction.ParameterReturnType.LITERAL
+
+    def method(self, context):
+        parameter_values = self.get_parameter_values(context)
+        if self.compare_opcode == 7:
+            flag = 1 if parameter_values[0] < parameter_values[1] else 0
+        else:
+            flag = 1 if parameter_values[0] == parameter_values[1] else 0
+        context.program_memory[parameter_values[2]] = flag
+
+        jump_pointer = context.execution_pointer + 4
+        if jump_pointer <= parameter_values[2] <= jump_pointer + 1:
+            # The compare rewrote the jump itself, so carry on from the jump as it now stands
+            context.execution_pointer = jump_pointer
+        elif (flag != 0) == (self.jump_opcode == 5):
+            # Read the destination after the store, in case it is the temporary or the jump's own
+            # destination cell, which prepare() read before the store
+            context.instruction_parameters[5]['value'] = context.program_memory[context.execution_pointer + 6]
+            context.execution_pointer = self.get_parameter_values(context)[5]
+        else:
+            self.update_execution_pointer(context)
+
+
+class MoveInstruction(Instruction):
+    """
+    Superinstruction for an Add of immediate 0 or a Multiply by immediate 1, which only copies its
+    source parameter (the first or the second) to the target
+    """
+
+    OPCODES = (110, 120)
+
+    def __init__(self, source):
+        super().__init__(100 + source * 10, 3)
+        self.superinstruction = True
+        self.source = source
+        self.parameter_return_type[2] = Instruction.ParameterReturnType.LITERAL
+
+    def method(self, context):
+        parameter_values = self.get_parameter_values(context)
+        context.program_memory[parameter_values[2]] = parameter_values[self.source - 1]
+        self.update_execution_pointer(context)
+
+
 class LessThanInstruction(Instruction):
 
     def __init__(self):
@@ -193,12 +237,8 @@ class LessThanInstruction(Instruction):
     def method(self, context):
         parameter_values = self.get_parameter_values(context)
         if parameter_values[0] < parameter_values[1]:
-            if context.debug:
-                print(f'Put 1 in {parameter_values[2]} because {parameter_values[0]} < {parameter_values[1]}')
             context.program_memory[parameter_values[2]] = 1
         else:
-            if context.debug:
-                print(f'Put 0 in {parameter_values[2]} because {parameter_values[0]} >= {parameter_values[1]}')
             context.program_memory[parameter_values[2]] = 0
         self.update_execution_pointer(context)
 
@@ -212,12 +252,8 @@ class EqualToInstruction(Instruction):
     def method(self, context):
         parameter_values = self.get_parameter_values(context)
         if parameter_values[0] == parameter_values[1]:
-            if context.debug:
-                print(f'Put 1 in {parameter_values[2]} because {parameter_values[0]} == {parameter_values[1]}')
             context.program_memory[parameter_values[2]] = 1
         else:
-            if context.debug:
-                print(f'Put 0 in {parameter_values[2]} because {parameter_values[0]} != {parameter_values[1]}')
             context.program_memory[parameter_values[2]] = 0
         self.update_execution_pointer(context)
 
@@ -242,10 +278,46 @@ class HaltInstruction(Instruction):
         raise ProgramHalted
 
 
+class TracedInstruction(Instruction):
+    """
+    Instrumented handler wrapping another instruction.  After each execution it calls
+    tracer(opcode, pointer, operands, target) with the resolved parameter values, less the address
+    written to, which is passed as target (None for instructions that write nothing)
+    """
+
+    def __init__(self, instruction, tracer):
+        super().__init__(instruction.opcode, instruction.parameter_count)
+        self.instruction = instruction
+        self.tracer = tracer
+        self.superinstruction = instruction.superinstruction
+        self.parameter_return_type = instruction.parameter_return_type
+
+    def execute(self, context, parameter_modes=None):
+        pointer = context.execution_pointer
+        self.instruction.prepare(context, parameter_modes)
+        parameter_values = self.instruction.get_parameter_values(context)
+        self.instruction.method(context)
+
+        target = None
+        operands = []
+        for value, return_type in zip(parameter_values, self.parameter_return_type):
+            if return_type == Instruction.ParameterReturnType.LITERAL:
+                target = value
+            else:
+                operands.append(value)
+        self.tracer(self.opcode, pointer, operands, target)
+
+
 class BasicInstructionSet:
 
     @staticmethod
-    def get():
+    def get(tracer=None):
+        """
+        The instruction set, with every handler wrapped in a TracedInstruction when given a tracer
+        """
+        if tracer is not None:
+            return [TracedInstruction(instruction, tracer) for instruction in BasicInstructionSet.get()]
+
         return [
             AddInstruction(),
             MultiplyInstruction(),
@@ -255,6 +327,12 @@ class BasicInstructionSet:
             JmpEQZInstruction(),
             LessThanInstruction(),
             EqualToInstruction(),
+            CompareBranchInstruction(7, 5),
+            CompareBranchInstruction(7, 6),
+            CompareBranchInstruction(8, 5),
+            CompareBranchInstruction(8, 6),
+            MoveInstruction(1),
+            MoveInstruction(2),
             UpdateRelativeBaseInstruction(),
             HaltInstruction(),
         ]
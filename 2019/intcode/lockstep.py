@@ -0,0 +1,175 @@
+import numpy as np
+from .exceptions import InvalidOpCode, InvalidParameterMode
+
+
+class LockstepProgram:
+    """
+    Many copies of one Intcode program run side by side, each on its own input, for programs such
+    as the day 19 drone probe whose control flow hardly depends on what they are fed.  Memory is a
+    lanes by cells int64 NumPy array and each pass executes one instruction for every lane sitting
+    on the lowest instruction pointer, so lanes that diverge simply run as separate groups until
+    they meet again.  Values have to fit in 64 bits
+    """
+
+    GROWTH = 1024
+
+    def __init__(self, program, lanes):
+        # Lanes start from the baseline image, so it makes no difference whether program has run
+        image = program.dump_checkpoint()
+        if image.sparse:
+            raise Exception('Lockstep programs need the whole of memory in the contiguous image')
+
+        self.lanes = lanes
+        self.memory = np.tile(np.asarray(image.cells, dtype=np.int64), (lanes, 1))
+        self.pointers = np.zeros(lanes, dtype=np.int64)
+        self.relative_bases = np.zeros(lanes, dtype=np.int64)
+        self.halted = np.zeros(lanes, dtype=bool)
+        self.waiting = np.zeros(lanes, dtype=bool)
+        self.input_values = np.zeros((lanes, 0), dtype=np.int64)
+        self.input_positions = np.zeros(lanes, dtype=np.int64)
+        self.output_values = np.zeros((lanes, 0), dtype=np.int64)
+        self.output_counts = np.zeros(lanes, dtype=np.int64)
+        self.passes = 0
+
+    @staticmethod
+    def map(program, inputs, batch_size=4096):
+        """
+        Run program once per row of inputs, each run starting from the baseline image reset() would
+        return to, and return the outputs of every run, batch_size runs at a time to keep the memory
+        array a sensible size
+        """
+        inputs = np.asarray(inputs, dtype=np.int64).reshape(len(inputs), -1)
+        outputs = []
+
+        for start in range(0, len(inputs), batch_size):
+            batch = inputs[start:start + batch_size]
+            lockstep = LockstepProgram(program, len(batch))
+            lockstep.queue_inputs(batch)
+            lockstep.run()
+            outputs.extend(lockstep.outputs(lane) for lane in range(len(batch)))
+
+        return outputs
+
+    def queue_inputs(self, values):
+        """
+        Queue one row of values per lane, every lane taking the same number of them
+        """
+        values = np.asarray(values, dtype=np.int64).reshape(self.lanes, -1)
+        self.input_values = np.hstack((self.input_values, values))
+        self.waiting[:] = False
+
+    def outputs(self, lane):
+        return self.output_values[lane, :self.output_counts[lane]].tolist()
+
+    def run(self):
+        """
+        Run until every lane has halted or is waiting for input
+        """
+        while True:
+            active = np.flatnonzero(~(self.halted | self.waiting))
+            if not active.size:
+                return
+
+            pointers = self.pointers[active]
+            pointer = int(pointers.min())
+            lanes = active[pointers == pointer]
+            self._ensure_size(pointer + 4)
+
+            # Self-modifying code can leave lanes on the same address with different instructions
+            opcodes = self.memory[lanes, pointer]
+            if (opcodes != opcodes[0]).any():
+                lanes = lanes[opcodes == opcodes[0]]
+
+            self._execute(lanes, pointer, int(opcodes[0]))
+            self.passes += 1
+
+    def _execute(self, lanes, pointer, extended_opcode):
+        if extended_opcode < 0:
+            raise InvalidOpCode(extended_opcode, pointer)
+        opcode = extended_opcode % 100
+        parameter_modes = [(extended_opcode // 10 ** (index + 2)) % 10 for index in range(3)]
+        for parameter_mode in parameter_modes:
+            if parameter_mode not in (0, 1, 2):
+                raise InvalidParameterMode(parameter_mode)
+
+        if opcode in (1, 2, 7, 8):
+            first = self._parameter(lanes, pointer, 0, parameter_modes[0])
+            second = self._parameter(lanes, pointer, 1, parameter_modes[1])
+            if opcode == 1:
+                result = first + second
+            elif opcode == 2:
+                result = first * second
+            elif opcode == 7:
+                result = (first < second).astype(np.int64)
+            else:
+                result = (first == second).astype(np.int64)
+            self._write(lanes, self._address(lanes, pointer, 2, parameter_modes[2]), result)
+            self.pointers[lanes] = pointer + 4
+
+        elif opcode in (5, 6):
+            value = self._parameter(lanes, pointer, 0, parameter_modes[0])
+            destination = self._parameter(lanes, pointer, 1, parameter_modes[1])
+            jump = value != 0 if opcode == 5 else value == 0
+            self.pointers[lanes] = np.where(jump, destination, pointer + 3)
+
+        elif opcode == 9:
+            self.relative_bases[lanes] += self._parameter(lanes, pointer, 0, parameter_modes[0])
+            self.pointers[lanes] = pointer + 2
+
+        elif opcode == 3:
+            # Lanes that have used up their input wait for more, the rest carry on
+            ready = self.input_positions[lanes] < self.input_values.shape[1]
+            self.waiting[lanes[~ready]] = True
+            lanes = lanes[ready]
+            if lanes.size:
+                values = self.input_values[lanes, self.input_positions[lanes]]
+                self._write(lanes, self._address(lanes, pointer, 0, parameter_modes[0]), values)
+                self.input_positions[lanes] += 1
+                self.pointers[lanes] = pointer + 2
+
+        elif opcode == 4:
+            self._append_output(lanes, self._parameter(lanes, pointer, 0, parameter_modes[0]))
+            self.pointers[lanes] = pointer + 2
+
+        elif opcode == 99:
+            self.halted[lanes] = True
+
+        else:
+            raise InvalidOpCode(opcode, pointer)
+
+    def _address(self, lanes, pointer, index, parameter_mode):
+        operand = self.memory[lanes, pointer + index + 1]
+        if parameter_mode == 2:
+            return operand + self.relative_bases[lanes]
+        return operand
+
+    def _parameter(self, lanes, pointer, index, parameter_mode):
+        if parameter_mode == 1:
+            return self.memory[lanes, pointer + index + 1]
+        return self._read(lanes, self._address(lanes, pointer, index, parameter_mode))
+
+    def _read(self, lanes, addresses):
+        self._check_addresses(addresses)
+        return self.memory[lanes, addresses]
+
+    def _write(self, lanes, addresses, values):
+        self._check_addresses(addresses)
+        self.memory[lanes, addresses] = values
+
+    def _check_addresses(self, addresses):
+        if addresses.min() < 0:
+            raise Exception(f'Lockstep programs can not address negative memory [{addresses.min()}]')
+        self._ensure_size(int(addresses.max()) + 1)
+
+    def _ensure_size(self, size):
+        width = self.memory.shape[1]
+        if size > width:
+            self.memory = np.pad(self.memory, ((0, 0), (0, max(size, width + LockstepProgram.GROWTH) - width)))
+
+    def _append_output(self, lanes, values):
+        positions = self.output_counts[lanes]
+        width = self.output_values.shape[1]
+        if positions.max() >= width:
+            self.output_values = np.pad(self.output_values, ((0, 0), (0, max(1, width))))
+        self.output_values[lanes, positions] = values
+        self.output_counts[lanes] += 1
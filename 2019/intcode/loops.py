@@ -0,0 +1,249 @@
+class Affine:
+    """
+    Value of a cell during one loop iteration: constant plus a sum of coefficient times the value
+    each cell held when the iteration started
+    """
+
+    __slots__ = ('constant', 'coefficients')
+
+    def __init__(self, constant, coefficients=None):
+        self.constant = constant
+        self.coefficients = {cell: coefficient for cell, coefficient in (coefficients or {}).items() if coefficient}
+
+    @staticmethod
+    def cell(address):
+        return Affine(0, {address: 1})
+
+    def __add__(self, other):
+        coefficients = dict(self.coefficients)
+        for cell, coefficient in other.coefficients.items():
+            coefficients[cell] = coefficients.get(cell, 0) + coefficient
+        return Affine(self.constant + other.constant, coefficients)
+
+    def __sub__(self, other):
+        return self + other.scale(-1)
+
+    def scale(self, factor):
+        return Affine(self.constant * factor, {cell: coefficient * factor
+                                               for cell, coefficient in self.coefficients.items()})
+
+
+class Flag:
+    """
+    Result of a compare instruction in a loop body, 1 when difference is below zero (less than) or
+    equal to zero (equals)
+    """
+
+    __slots__ = ('less_than', 'difference')
+
+    def __init__(self, less_than, difference):
+        self.less_than = less_than
+        self.difference = difference
+
+
+class LoopSummary:
+    """
+    A summarizable loop: each counter cell changes by a fixed step every iteration and every other
+    cell the body writes is written before it is read, so after k iterations the counters are all
+    that differs.  The loop goes round again while condition(difference after k iterations) holds
+    """
+
+    __slots__ = ('source', 'exit', 'counters', 'difference', 'condition')
+
+    def __init__(self, source, exit, counters, difference, condition):
+        self.source = source
+        self.exit = exit
+        self.counters = counters
+        self.difference = difference
+        self.condition = condition
+
+
+class LoopSummarizer:
+    """
+    Fast-forward for delay loops.  When the interpreter takes a jump back to head it hands the loop
+    over here, and a single basic block of adds, multiplies and compares ending in that jump, which
+    only steps counters by constants, has its iteration count worked out in closed form.  Counters
+    are moved straight to their values at the start of the last iteration, which the interpreter
+    then runs as normal on its way out of the loop.  Skipped iterations fire no watchpoints and are
+    not profiled.  With verify on, every fast-forward is checked against stepping the loop in a fork
+    """
+
+    MAX_INSTRUCTIONS = 16
+    MIN_ITERATIONS = 16
+
+    def __init__(self, program, verify=False):
+        self.program = program
+        self.verify = verify
+        self.fast_forwards = 0
+        self.skipped_iterations = 0
+        # Loop head and relative base to summary, or to the loop's source cells when it can't be summarized
+        self._summaries = {}
+
+    def fast_forward(self, head, jump, relative_base):
+        """
+        Called as the jump at address jump goes back to head.  Returns whether the counters were moved on
+        """
+        memory = self.program._memory
+        summary = self._summaries.get((head, relative_base))
+        if summary is not None:
+            source = summary.source if isinstance(summary, LoopSummary) else summary
+            if any(memory[address] != value for address, value in enumerate(source, head)):
+                summary = None
+        if summary is None:
+            summary = self.summarize(head, jump, relative_base)
+            self._summaries[(head, relative_base)] = summary
+        if not isinstance(summary, LoopSummary):
+            return False
+
+        # The difference after k more iterations is base + slope * k
+        base = summary.difference.constant
+        slope = 0
+        for cell, coefficient in summary.difference.coefficients.items():
+            base += coefficient * memory[cell]
+            slope += coefficient * summary.counters.get(cell, 0)
+
+        iterations = LoopSummarizer.exit_iteration(summary.condition, base, slope)
+        if iterations is None or iterations < LoopSummarizer.MIN_ITERATIONS:
+            return False
+
+        if self.verify:
+            expected = self._step_loop(head, summary.exit, relative_base)
+
+        for cell, step in summary.counters.items():
+            memory[cell] += step * iterations
+        self.fast_forwards += 1
+        self.skipped_iterations += iterations
+
+        if self.verify:
+            actual = self._step_loop(head, summary.exit, relative_base)
+            if actual != expected:
+                raise Exception(f'Fast-forward of the loop at {head} disagrees with the interpreter')
+        return True
+
+    @staticmethod
+    def exit_iteration(condition, base, slope):
+        """
+        First k from 0 for which condition(base + slope * k) fails, or None if it never does
+        """
+        if condition == 'nonzero':
+            if slope == 0 or -base % slope or -base // slope < 0:
+                return None
+            return -base // slope
+        if condition == 'negative':
+            if base >= 0:
+                return 0
+            return None if slope <= 0 else -(base // slope)
+        if condition == 'not negative':
+            if base < 0:
+                return 0
+            return None if slope >= 0 else base // -slope + 1
+        # 'zero' only goes round again while nothing changes, which is either once or forever
+        if base != 0:
+            return 0
+        return 1 if slope != 0 else None
+
+    def summarize(self, head, jump, relative_base):
+        """
+        LoopSummary of the loop from head back through jump, or the cells read while trying if it
+        isn't a loop that can be summarized
+        """
+        memory = self.program._memory
+        written = {}
+        read_first = set()
+        address = head
+
+        def operand_address(index, mode):
+            operand = memory[address + index + 1]
+            return operand + relative_base if mode == 2 else operand
+
+        def read(index, mode):
+            if mode == 1:
+                return Affine(memory[address + index + 1])
+            cell = operand_address(index, mode)
+            if cell not in written:
+                read_first.add(cell)
+                return Affine.cell(cell)
+            return written[cell]
+
+        for _ in range(LoopSummarizer.MAX_INSTRUCTIONS):
+            extended_opcode = memory[address]
+            if extended_opcode < 0:
+                break
+            opcode = extended_opcode % 100
+            modes = [(extended_opcode // 10 ** (index + 2)) % 10 for index in range(3)]
+            if any(mode not in (0, 1, 2) for mode in modes):
+                break
+
+            if opcode in (1, 2, 7, 8):
+                if modes[2] == 1:
+                    break
+                first, second = read(0, modes[0]), read(1, modes[1])
+                target = operand_address(2, modes[2])
+                if not (isinstance(first, Affine) and isinstance(second, Affine)):
+                    written[target] = None
+                elif opcode == 1:
+                    written[target] = first + second
+                elif opcode == 2:
+                    if not first.coefficients:
+                        written[target] = second.scale(first.constant)
+                    elif not second.coefficients:
+                        written[target] = first.scale(second.constant)
+                    else:
+                        written[target] = None
+                else:
+                    written[target] = Flag(opcode == 7, first - second)
+                address += 4
+
+            elif opcode in (5, 6):
+                value = read(0, modes[0])
+                destination = read(1, modes[1])
+                if address != jump or not isinstance(destination, Affine) or destination.coefficients or \
+                        destination.constant != head:
+                    break
+                return self._summary(head, address + 3, written, read_first, opcode == 5, value)
+
+            else:
+                break
+
+        return tuple(memory[cell] for cell in range(head, address + 4))
+
+    def _summary(self, head, exit, written, read_first, jump_if_true, value):
+        memory = self.program._memory
+        source = tuple(memory[cell] for cell in range(head, exit))
+
+        counters = {}
+        for cell, expression in written.items():
+            if head <= cell < exit:
+                # Rewrites its own code
+                return source
+            if cell not in read_first:
+                continue
+            if not isinstance(expression, Affine) or expression.coefficients != {cell: 1}:
+                return source
+            counters[cell] = expression.constant
+
+        if isinstance(value, Flag):
+            difference = value.difference
+            if value.less_than:
+                condition = 'negative' if jump_if_true else 'not negative'
+            else:
+                condition = 'zero' if jump_if_true else 'nonzero'
+        elif isinstance(value, Affine):
+            difference = value
+            condition = 'nonzero' if jump_if_true else 'zero'
+        else:
+            return source
+
+        return LoopSummary(source, exit, counters, difference, condition)
+
+    def _step_loop(self, head, exit, relative_base):
+        # Runs a fork of the program through the loop one instruction at a time, as the interpreter would
+        reference = self.program.fork()
+        reference._loop_summarizer = None
+        # The program is suspended mid-run, so the fork keeps clear of the caches it is running on
+        reference._memory._leave_caches()
+        reference._next_instruction = head
+        reference._relative_base_offset = relative_base
+        while reference._next_instruction != exit:
+            reference.execute_next()
+        return list(reference._memory.dump().cells), dict(reference._memory.sparse)
@@ -0,0 +1,482 @@
+import hashlib
+import os
+import tempfile
+import weakref
+from array import array
+
+
+# Where parsed program images (and transpiled modules) are cached, next to the program file
+CACHE_DIRECTORY = '__intcode__'
+
+
+class MemoryImage:
+    """
+    Compact copy of an IntcodeMemory.  Cells are packed in to an array('q') and only promoted
+    to a list of Python ints when a value does not fit in 64 bits
+    """
+
+    def __init__(self, cells, sparse):
+        try:
+            self.cells = array('q', cells)
+        except OverflowError:
+            self.cells = list(cells)
+        self.sparse = dict(sparse)
+
+    def __len__(self):
+        return len(self.cells) + len(self.sparse)
+
+    @staticmethod
+    def from_file(file_name, cache_directory=None):
+        """
+        Image of the comma separated Intcode program in file_name.  The text is only parsed the first
+        time a program is seen, after that its cells are read straight in from a binary copy cached
+        by the hash of the program text
+        """
+        with open(file_name, 'rb') as program_file:
+            text = program_file.read()
+
+        if cache_directory is None:
+            cache_directory = os.path.join(os.path.dirname(os.path.abspath(file_name)), CACHE_DIRECTORY)
+        path = os.path.join(cache_directory, f'image_{hashlib.sha256(text).hexdigest()[:16]}.bin')
+
+        if os.path.exists(path):
+            cells = array('q')
+            with open(path, 'rb') as image_file:
+                data = image_file.read()
+            # Anything but whole cells can't be a cached image, so it is parsed and written again
+            if data and len(data) % cells.itemsize == 0:
+                cells.frombytes(data)
+                return MemoryImage(cells, {})
+
+        image = MemoryImage(map(int, text.split(b',')), {})
+        # Programs with cells too big for 64 bits are parsed every time
+        if isinstance(image.cells, array) and image.cells:
+            write_cache_file(path, image.cells.tobytes())
+        return image
+
+
+def write_cache_file(path, data):
+    """
+    Write data, bytes, to path through a temporary file of its own and an atomic rename, so any
+    number of processes can fill the same cache at once and readers only ever see a whole file.
+    Returns False, rather than raising, when the file can't be written
+    """
+    directory = os.path.dirname(path)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        descriptor, temporary_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    except OSError:
+        return False
+
+    try:
+        with os.fdopen(descriptor, 'wb') as cache_file:
+            cache_file.write(data)
+        os.replace(temporary_path, path)
+    except OSError:
+        try:
+            os.unlink(temporary_path)
+        except OSError:
+            pass
+        return False
+    return True
+
+
+class IntcodeMemory:
+    """
+    Hybrid Intcode memory.  Addresses from zero through the end of the program image, plus a
+    growable region past it, live in contiguous fixed size pages so reads and writes are index
+    operations.  Far away addresses (and negative ones) fall back to a sparse dict.  Unwritten
+    addresses read as 0
+
+    Pages are copy-on-write: a fork shares every page with its parent and whichever side writes
+    to a shared page first takes its own copy of it.  A checkpoint shares its pages the same way,
+    so the pages owned since the checkpoint are exactly the ones a restore has to put back
+
+    The per-address caches (decoded instructions, fused cells and compiled blocks) are shared by a
+    fork too.  Whichever memory changes them first keeps them and every other memory sharing them
+    moves on to one copy, so a program that is running never has its caches swapped from under it
+
+    plain_pages flags each page that this memory owns and that has nothing cached, fused or
+    watched on it, while no state hash is kept.  A write to a flagged page needs nothing but the
+    store itself, so the interpreter and compiled blocks make it straight in to the page and only
+    go through __setitem__ for the rest.  The flags are changed in place, never replaced
+    """
+
+    PAGE_BITS = 8
+    PAGE_SIZE = 1 << PAGE_BITS
+    PAGE_MASK = PAGE_SIZE - 1
+    GROWTH_LIMIT = 4096
+
+    ZERO_PAGE = (0,) * PAGE_SIZE
+
+    def __init__(self):
+        self.pages = []
+        self.size = 0
+        self.sparse = {}
+        self.decode_cache = {}
+        self.block_cache = {}
+        self._block_cells = {}
+        self._fused_cells = {}
+        self._code_pages = set()
+        self._cache_sharers = None
+        self.watchpoints = {}
+        self._watched_pages = set()
+        self.state_hash = None
+        self._owned = bytearray()
+        self.plain_pages = bytearray()
+        self._dirty = set()
+        self._sparse_written = False
+        self._checkpoint = None
+
+    def __len__(self):
+        return self.size + len(self.sparse)
+
+    def __getitem__(self, address):
+        if 0 <= address < self.size:
+            return self.pages[address >> IntcodeMemory.PAGE_BITS][address & IntcodeMemory.PAGE_MASK]
+        return self.sparse.get(address, 0)
+
+    def __setitem__(self, address, value):
+        if self.state_hash is not None:
+            self.state_hash ^= IntcodeMemory.cell_hash(address, self[address]) ^ \
+                               IntcodeMemory.cell_hash(address, value)
+
+        if 0 <= address < self.size:
+            page_index = address >> IntcodeMemory.PAGE_BITS
+            page = self.pages[page_index] if self._owned[page_index] else self._writable_page(page_index)
+            page[address & IntcodeMemory.PAGE_MASK] = value
+        elif self.size <= address < self.size + IntcodeMemory.GROWTH_LIMIT:
+            self._grow(address + 1)
+            self._writable_page(address >> IntcodeMemory.PAGE_BITS)[address & IntcodeMemory.PAGE_MASK] = value
+        else:
+            self.sparse[address] = value
+            self._sparse_written = True
+
+        if address in self.decode_cache or address in self._block_cells or address in self._fused_cells:
+            self._drop_cached(address)
+        if address in self.watchpoints:
+            for callback in self.watchpoints[address]:
+                callback(address, value)
+
+    @staticmethod
+    def cell_hash(address, value):
+        # Zero cells hash to nothing, so growing memory or writing a 0 to an unused cell changes nothing
+        return hash((address, value)) if value else 0
+
+    def track_state_hash(self):
+        """
+        Start keeping state_hash, a Zobrist style hash of every cell.  Each cell contributes its own
+        hash and they are combined with xor, so a write updates it in constant time
+        """
+        if self.state_hash is None:
+            self.state_hash = self._hash_cells()
+            self.plain_pages[:] = bytes(len(self.plain_pages))
+
+    def _hash_cells(self, pages=None, sparse=None):
+        pages = self.pages if pages is None else pages
+        sparse = self.sparse if sparse is None else sparse
+        state_hash = 0
+        for page_index, page in enumerate(pages):
+            state_hash ^= self._hash_page(page_index, page)
+        for address, value in sparse.items():
+            state_hash ^= IntcodeMemory.cell_hash(address, value)
+        return state_hash
+
+    @staticmethod
+    def _hash_page(page_index, page):
+        state_hash = 0
+        if page is not IntcodeMemory.ZERO_PAGE:
+            for address, value in enumerate(page, page_index << IntcodeMemory.PAGE_BITS):
+                if value:
+                    state_hash ^= hash((address, value))
+        return state_hash
+
+    def watch(self, addresses, callback):
+        """
+        Call callback(address, value) after every write to any of addresses.  Only writes made
+        through the memory fire it, not a restore or load, and forks start with no watchpoints
+        """
+        for address in addresses:
+            self.watchpoints.setdefault(address, []).append(callback)
+            self._watched_pages.add(address >> IntcodeMemory.PAGE_BITS)
+            self._unplain(address >> IntcodeMemory.PAGE_BITS)
+
+    def unwatch(self, addresses, callback):
+        for address in addresses:
+            callbacks = self.watchpoints.get(address, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+            if not callbacks:
+                self.watchpoints.pop(address, None)
+
+    def add_decode(self, address, decoded):
+        self._own_caches()
+        self._add_code(address)
+        self.decode_cache[address] = decoded
+
+    def clear_decodes(self):
+        self._own_caches()
+        self.decode_cache.clear()
+
+    def add_fused(self, address, cells):
+        """
+        Tie the fused decode cached at address to the other cells it was fused from, so writing any
+        of them drops it.  Returns False without tying anything if one of those cells is already
+        tied to a different fused decode
+        """
+        if any(self._fused_cells.get(cell, address) != address for cell in cells):
+            return False
+        self._own_caches()
+        for cell in cells:
+            self._add_code(cell)
+            self._fused_cells[cell] = address
+        return True
+
+    def add_block(self, block):
+        """
+        Cache a compiled block, which is dropped again as soon as any cell from block.start up to
+        block.end is written to
+        """
+        self._own_caches()
+        self.block_cache[block.start] = block
+        for address in range(block.start, block.end):
+            self._add_code(address)
+            self._block_cells[address] = self._block_cells.get(address, frozenset()) | {block.start}
+
+    def _add_code(self, address):
+        # The page now has something cached on it, so writes to it have to go through __setitem__
+        page_index = address >> IntcodeMemory.PAGE_BITS
+        if page_index not in self._code_pages:
+            self._code_pages.add(page_index)
+            self._unplain(page_index)
+
+    def _unplain(self, page_index):
+        if 0 <= page_index < len(self.plain_pages):
+            self.plain_pages[page_index] = 0
+
+    def _is_plain(self, page_index):
+        return self.state_hash is None and page_index not in self._code_pages and \
+            page_index not in self._watched_pages
+
+    def _drop_cached(self, address):
+        # Drop the cached decode of any instruction, and any compiled block, that address was part of
+        self._own_caches()
+        self.decode_cache.pop(address, None)
+        if address in self._fused_cells:
+            self.decode_cache.pop(self._fused_cells.pop(address), None)
+        for start in self._block_cells.pop(address, ()):
+            block = self.block_cache.pop(start, None)
+            if block is not None:
+                for cell in range(block.start, block.end):
+                    starts = self._block_cells.get(cell, frozenset()) - {start}
+                    if starts:
+                        self._block_cells[cell] = starts
+                    else:
+                        self._block_cells.pop(cell, None)
+
+    def _own_caches(self):
+        """
+        Make the per-address caches this memory's own before changing them.  The other memories
+        still sharing them move on to a single copy, which is cheap as every value in them is
+        immutable
+        """
+        sharers = self._cache_sharers
+        if sharers is None:
+            return
+        self._cache_sharers = None
+        sharers.discard(self)
+        if sharers:
+            caches = (dict(self.decode_cache), dict(self.block_cache), dict(self._block_cells), dict(self._fused_cells),
+                      set(self._code_pages))
+            for memory in sharers:
+                memory.decode_cache, memory.block_cache, memory._block_cells, memory._fused_cells, \
+                    memory._code_pages = caches
+
+    def _leave_caches(self):
+        # Start again with empty caches of our own, leaving any shared ones to the other memories
+        if self._cache_sharers is not None:
+            self._cache_sharers.discard(self)
+            self._cache_sharers = None
+        self.decode_cache = {}
+        self.block_cache = {}
+        self._block_cells = {}
+        self._fused_cells = {}
+        self._code_pages = set()
+
+    def _writable_page(self, page_index):
+        if not self._owned[page_index]:
+            self.pages[page_index] = list(self.pages[page_index])
+            self._owned[page_index] = 1
+            self._dirty.add(page_index)
+            self.plain_pages[page_index] = self._is_plain(page_index)
+        return self.pages[page_index]
+
+    def _grow(self, size):
+        start = self.size
+        while self.size < size:
+            # Fresh pages share the zero page until they are written to
+            self.pages.append(IntcodeMemory.ZERO_PAGE)
+            self._owned.append(0)
+            self.plain_pages.append(0)
+            self._dirty.add(len(self.pages) - 1)
+            self.size += IntcodeMemory.PAGE_SIZE
+
+        # Sparse cells now covered by the contiguous region move in to it
+        for address in [address for address in self.sparse if start <= address < self.size]:
+            value = self.sparse.pop(address)
+            self._sparse_written = True
+            self._writable_page(address >> IntcodeMemory.PAGE_BITS)[address & IntcodeMemory.PAGE_MASK] = value
+
+    def values(self):
+        for page in self.pages:
+            yield from page
+        yield from self.sparse.values()
+
+    def fork(self):
+        """
+        Copy-on-write clone.  Only the page table is copied, so the cost is proportional to the
+        number of pages rather than the number of cells, and neither side owns a page until it
+        writes to it again.  The per-address caches are shared rather than copied
+        """
+        clone = IntcodeMemory()
+        clone.pages = list(self.pages)
+        clone.size = self.size
+        clone.sparse = dict(self.sparse)
+        clone._owned = bytearray(len(self.pages))
+        clone.plain_pages = bytearray(len(self.pages))
+        clone._dirty = set(self._dirty)
+        clone._sparse_written = self._sparse_written
+        clone._checkpoint = self._checkpoint
+        if self._cache_sharers is None:
+            self._cache_sharers = weakref.WeakSet([self])
+        self._cache_sharers.add(clone)
+        clone._cache_sharers = self._cache_sharers
+        clone.decode_cache = self.decode_cache
+        clone.block_cache = self.block_cache
+        clone._block_cells = self._block_cells
+        clone._fused_cells = self._fused_cells
+        clone._code_pages = self._code_pages
+        clone.state_hash = self.state_hash
+        self._owned = bytearray(len(self.pages))
+        self.plain_pages[:] = bytes(len(self.pages))
+        return clone
+
+    def checkpoint(self):
+        """
+        Record the current contents as the state restore() returns to
+        """
+        self._checkpoint = (list(self.pages), self.size, dict(self.sparse))
+        self._owned = bytearray(len(self.pages))
+        self.plain_pages[:] = bytes(len(self.pages))
+        self._dirty = set()
+        self._sparse_written = False
+
+    def restore(self):
+        """
+        Return to the last checkpoint, putting back only the pages written since it was taken
+        """
+        if self._checkpoint is None:
+            raise Exception('No checkpoint to restore memory to')
+        checkpoint_pages, checkpoint_size, checkpoint_sparse = self._checkpoint
+
+        # Cached decodes and compiled blocks survive unless a cell they were decoded from is about
+        # to change, and only cells on the pages written since the checkpoint can
+        for address in self._changed_cells(checkpoint_pages, checkpoint_sparse):
+            if address in self.decode_cache or address in self._block_cells or address in self._fused_cells:
+                self._drop_cached(address)
+
+        if self.state_hash is not None:
+            for page_index in self._dirty:
+                if page_index < len(self.pages):
+                    self.state_hash ^= self._hash_page(page_index, self.pages[page_index])
+                if page_index < len(checkpoint_pages):
+                    self.state_hash ^= self._hash_page(page_index, checkpoint_pages[page_index])
+            if self._sparse_written:
+                self.state_hash ^= self._hash_cells([], self.sparse) ^ self._hash_cells([], checkpoint_sparse)
+
+        del self.pages[len(checkpoint_pages):]
+        del self._owned[len(checkpoint_pages):]
+        del self.plain_pages[len(checkpoint_pages):]
+        self.size = checkpoint_size
+        for page_index in self._dirty:
+            if page_index < len(checkpoint_pages):
+                self.pages[page_index] = checkpoint_pages[page_index]
+                self._owned[page_index] = 0
+                self.plain_pages[page_index] = 0
+
+        if self._sparse_written:
+            self.sparse = dict(checkpoint_sparse)
+
+        self._dirty = set()
+        self._sparse_written = False
+
+    def _changed_cells(self, checkpoint_pages, checkpoint_sparse):
+        """
+        Addresses whose value differs from the checkpoint.  Only dirty pages are compared, and the
+        sparse cells when any of them were written
+        """
+        changed = []
+        for page_index in self._dirty:
+            page = self.pages[page_index]
+            start = page_index << IntcodeMemory.PAGE_BITS
+            if page_index < len(checkpoint_pages):
+                checkpoint_page = checkpoint_pages[page_index]
+                if page is not checkpoint_page and page != checkpoint_page:
+                    changed.extend(address for address, value, original in
+                                   zip(range(start, start + IntcodeMemory.PAGE_SIZE), page, checkpoint_page)
+                                   if value != original)
+            elif page is not IntcodeMemory.ZERO_PAGE:
+                changed.extend(address for address, value in enumerate(page, start)
+                               if value != checkpoint_sparse.get(address, 0))
+
+        if self._sparse_written:
+            changed.extend(address for address in self.sparse.keys() | checkpoint_sparse.keys()
+                           if self.sparse.get(address, 0) != checkpoint_sparse.get(address, 0))
+        return changed
+
+    def dump(self):
+        return MemoryImage((value for page in self.pages for value in page), self.sparse)
+
+    def dump_checkpoint(self):
+        """
+        MemoryImage of the last checkpoint, which is what restore() would put back
+        """
+        if self._checkpoint is None:
+            raise Exception('No checkpoint to dump')
+        checkpoint_pages, checkpoint_size, checkpoint_sparse = self._checkpoint
+        return MemoryImage((value for page in checkpoint_pages for value in page), checkpoint_sparse)
+
+    def load(self, image):
+        """
+        Replace the whole of memory with a MemoryImage, or with a dict of address to value
+        """
+        self._leave_caches()
+        self.pages = []
+        self.size = 0
+        self.sparse = {}
+        self._owned = bytearray()
+        self.plain_pages[:] = b''
+        self._dirty = set()
+        self._sparse_written = False
+        self._checkpoint = None
+        tracking_state_hash = self.state_hash is not None
+        self.state_hash = None
+
+        if isinstance(image, MemoryImage):
+            cells = image.cells
+            for start in range(0, len(cells), IntcodeMemory.PAGE_SIZE):
+                page = list(cells[start:start + IntcodeMemory.PAGE_SIZE])
+                page.extend([0] * (IntcodeMemory.PAGE_SIZE - len(page)))
+                self.pages.append(page)
+                self._owned.append(1)
+                self.plain_pages.append(self._is_plain(len(self.pages) - 1))
+                self.size += IntcodeMemory.PAGE_SIZE
+            self.sparse.update(image.sparse)
+        elif isinstance(image, dict):
+            for address, value in image.items():
+                self[address] = value
+        else:
+            raise Exception('Failed loading invalid memory')
+
+        if tracking_state_hash:
+            self.track_state_hash()
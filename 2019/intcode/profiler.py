@@ -0,0 +1,114 @@
+import json
+from collections import defaultdict
+from .exceptions import InvalidOpCode
+
+
+class Profiler:
+    """
+    Execution profile of one or more IntcodeProgram runs.  While profiling, the VM only bumps a
+    counter per instruction address (or per compiled block) and times each run_until_io call;
+    opcode counts, instruction rates and the hot address list are all worked out when reporting
+    """
+
+    def __init__(self):
+        self.program = None
+        self.address_counts = defaultdict(int)
+        self.block_counts = defaultdict(int)
+        self.runs = 0
+        self.io_waits = 0
+        self.outputs = 0
+        self.elapsed = 0.0
+
+    def record_run(self, status, elapsed):
+        self.runs += 1
+        self.elapsed += elapsed
+        if status == self.program.ExecutionStatus.NEEDS_INPUT:
+            self.io_waits += 1
+        elif status == self.program.ExecutionStatus.OUTPUT_READY:
+            self.outputs += 1
+
+    def instruction_counts(self):
+        """
+        Executions per instruction address, with every compiled block run credited to each
+        instruction in the block as it was compiled.  Superinstructions are counted as the
+        instructions they stand for, so a fused compare and branch is one execution of the compare
+        and one of the jump
+        """
+        # Halts and inputs that were waiting are taken back off, which can leave an address at 0
+        counts = defaultdict(int, {address: count for address, count in self.address_counts.items() if count})
+        for block, count in self.block_counts.items():
+            address = block.start
+            while address < block.end:
+                counts[address] += count
+                try:
+                    instruction = self.program.get_instruction_by_opcode(block.source[address - block.start])
+                except InvalidOpCode:
+                    break
+                address += instruction.parameter_count + 1
+        return counts
+
+    def opcode_counts(self, instruction_counts=None):
+        if instruction_counts is None:
+            instruction_counts = self.instruction_counts()
+
+        counts = defaultdict(int)
+        for address, count in instruction_counts.items():
+            counts[self._describe(address)] += count
+        return counts
+
+    def _describe(self, address):
+        # Decoded against memory as it stands now, so code that rewrote itself shows its final form.
+        # The opcode is the program's own, never that of a superinstruction run in its place
+        try:
+            instruction = self.program.get_instruction_by_opcode(self.program.get_memory_address(address))
+        except InvalidOpCode:
+            return 'Invalid'
+        return f'{instruction.opcode} {instruction.__class__.__name__[:-len("Instruction")]}'
+
+    def summary(self):
+        instruction_counts = self.instruction_counts()
+        total = sum(instruction_counts.values())
+
+        return {
+            'instructions': total,
+            'elapsed': self.elapsed,
+            'instructions_per_second': total / self.elapsed if self.elapsed else 0,
+            'runs': self.runs,
+            'io_waits': self.io_waits,
+            'outputs': self.outputs,
+            'opcodes': dict(sorted(self.opcode_counts(instruction_counts).items(), key=lambda item: -item[1])),
+            'addresses': {
+                str(address): count
+                for address, count in sorted(instruction_counts.items(), key=lambda item: (-item[1], item[0]))
+            },
+        }
+
+    def to_json(self, file_name=None):
+        """
+        The profile summary as JSON, also written to file_name if one is given
+        """
+        profile = json.dumps(self.summary(), indent=2)
+        if file_name is not None:
+            with open(file_name, 'w') as json_file:
+                json_file.write(profile)
+        return profile
+
+    def report(self, hot_addresses=20):
+        summary = self.summary()
+        total = summary['instructions'] or 1
+
+        lines = [
+            f'{summary["instructions"]} instructions in {summary["elapsed"]:.3f}s '
+            f'({summary["instructions_per_second"]:,.0f} per second)',
+            f'{summary["runs"]} runs, {summary["outputs"]} outputs, {summary["io_waits"]} waits for input',
+            '',
+            'Opcodes:',
+        ]
+        for opcode, count in summary['opcodes'].items():
+            lines.append(f'  {opcode:<24} {count:>12} {100 * count / total:6.2f}%')
+
+        lines.extend(['', f'Hottest {hot_addresses} addresses:'])
+        for address, count in list(summary['addresses'].items())[:hot_addresses]:
+            lines.append(f'  {address:>8} {self._describe(int(address)):<24} {count:>12} {100 * count / total:6.2f}%')
+
+        return '\n'.join(lines)
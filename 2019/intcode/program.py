@@ -0,0 +1,714 @@
+import copy
+import enum
+import time
+from queue import Empty
+from .channel import Channel
+from .compiler import BlockCompiler, CompiledBlock
+from .exceptions import InvalidOpCode, InvalidParameterMode, WaitingForInput
+from .instruction import BasicInstructionSet
+from .loops import LoopSummarizer
+from .memory import IntcodeMemory, MemoryImage
+
+
+class IntcodeProgram:
+
+    class IOScheme:
+        CONSOLE = 1
+        QUEUE = 2
+
+    class Engine:
+        INTERPRETER = 1
+        BLOCK_COMPILER = 2
+        TRANSPILED = 3
+
+    class ExecutionStatus(enum.Enum):
+        RUNNING = 0
+        NEEDS_INPUT = 1
+        OUTPUT_READY = 2
+        HALTED = 3
+        REVISITED = 4
+
+    class ExecutionContext:
+        def __init__(self,
+                     extended_opcode=None,
+                     execution_pointer=None,
+                     program_memory=None,
+                     instruction_parameters=None,
+                     input_queue=None,
+                     output_queue=None,
+                     relative_base=0,
+                     input_prompt='',
+                     output_format='{}'):
+            self.extended_opcode = extended_opcode
+            self.execution_pointer = execution_pointer
+            self.program_memory = program_memory
+            self.instruction_parameters = instruction_parameters
+            self.input_queue = input_queue
+            self.output_queue = output_queue
+            self.relative_base = relative_base
+            self.input_prompt = input_prompt
+            self.output_format = output_format
+
+        def __str__(self):
+            return f'Execution Context: ' \
+                   f'[{self.extended_opcode}] @{self.execution_pointer} with {self.instruction_parameters}'
+
+    def __init__(self, io_scheme=IOScheme.CONSOLE, engine=Engine.INTERPRETER, profiler=None, tracer=None,
+                 **kwargs):
+        self._memory = IntcodeMemory()
+        self._instructions = []
+        self._opcode_table = {}
+        self._superinstructions = {}
+        self._next_instruction = 0
+        self._relative_base_offset = 0
+        self._input_queue = None
+        self._output_queue = None
+
+        if io_scheme == IntcodeProgram.IOScheme.QUEUE:
+            self._input_queue = kwargs['input_queue'] if 'input_queue' in kwargs else Channel()
+            self._output_queue = kwargs['output_queue'] if 'output_queue' in kwargs else Channel()
+
+        # The CONSOLE scheme prompts for input and prints output in these formats
+        self._input_prompt = kwargs['input_prompt'] if 'input_prompt' in kwargs else 'BOOST needs input: '
+        self._output_format = kwargs['output_format'] if 'output_format' in kwargs else '[DIAGNOSTIC] {}'
+
+        self._engine = engine
+        self._block_compiler = None
+        if engine != IntcodeProgram.Engine.INTERPRETER:
+            # Transpiled programs bring their blocks with them and interpret anything else
+            self._block_compiler = BlockCompiler(self, compile_on_miss=engine == IntcodeProgram.Engine.BLOCK_COMPILER)
+
+        self._profiler = None
+        if profiler is not None:
+            self.attach_profiler(profiler)
+
+        self._tracer = tracer
+        self._initialize_instruction_set()
+
+        self._visited_states = None
+        self._loop_summarizer = None
+
+    def _initialize_instruction_set(self):
+        for instruction in BasicInstructionSet.get(self._tracer):
+            self._instructions.append(instruction)
+            if instruction.superinstruction:
+                self._superinstructions[instruction.opcode] = instruction
+            else:
+                self._opcode_table[instruction.opcode] = instruction
+
+    def __str__(self):
+        return ','.join([str(x) for x in self._memory.values()])
+
+    def get_instruction_by_opcode(self, opcode):
+        # Python's modulo would map negative cells on to real opcodes, -1 % 100 being a halt
+        if opcode < 0:
+            raise InvalidOpCode(opcode)
+        try:
+            return self._opcode_table[opcode % 100]
+        except KeyError:
+            raise InvalidOpCode(opcode)
+
+    def decode_instruction(self, address):
+        """
+        Decoded instructions are cached by address as (instruction, parameter modes, parameter count).
+        Operand values are still read from memory on every execution, so only a write to the opcode
+        itself invalidates an entry (see IntcodeMemory)
+        """
+        decoded = self._memory.decode_cache.get(address)
+        if decoded is None:
+            decoded = self._fuse(address, self._decode_unfused(address))
+            self._memory.add_decode(address, decoded)
+        return decoded
+
+    def _decode_unfused(self, address):
+        # The program's own instruction at address, straight from memory and never cached or fused
+        extended_opcode = self._memory[address]
+        instruction = self.get_instruction_by_opcode(extended_opcode)
+        parameter_modes = tuple(instruction.parse_extended_opcode(extended_opcode))
+        for mode in parameter_modes:
+            if mode not in (0, 1, 2):
+                raise InvalidParameterMode(mode)
+        return instruction, parameter_modes, instruction.parameter_count
+
+    def _fuse(self, address, decoded):
+        """
+        Peephole pass over a freshly decoded instruction.  A move, or a compare whose temporary is
+        tested by the jump straight after it, is swapped for the matching superinstruction, and the
+        cells that decision rests on are handed to memory so writing any of them undoes it
+        """
+        instruction, parameter_modes, parameter_count = decoded
+        memory = self._memory
+
+        # A trace shows the program's own instructions, so nothing is fused while tracing
+        if self._tracer is not None:
+            return decoded
+
+        if instruction.opcode in (1, 2):
+            identity = 0 if instruction.opcode == 1 else 1
+            for source, other in ((1, 2), (2, 1)):
+                if parameter_modes[other - 1] == 1 and memory[address + other] == identity:
+                    if memory.add_fused(address, (address + other,)):
+                        return self._superinstructions[100 + source * 10], parameter_modes, parameter_count
+                    break
+
+        elif instruction.opcode in (7, 8) and parameter_modes[2] != 1:
+            target = memory[address + 3]
+            jump_address = address + 4
+            # A temporary stored over the jump's opcode or flag changes the jump, so it can't be fused
+            if parameter_modes[2] == 0 and jump_address <= target <= jump_address + 1:
+                return decoded
+            # Decoded without fusing, so a run of compares doesn't fuse each one in to the next
+            try:
+                jump, jump_modes, _ = self._decode_unfused(jump_address)
+            except (InvalidOpCode, InvalidParameterMode):
+                return decoded
+            if jump.opcode in (5, 6) and jump_modes[0] == parameter_modes[2] and memory[jump_address + 1] == target:
+                if memory.add_fused(address, (address + 3, jump_address, jump_address + 1)):
+                    superinstruction = self._superinstructions[100 + instruction.opcode * 10 + jump.opcode]
+                    return superinstruction, parameter_modes + (1,) + jump_modes, superinstruction.parameter_count
+
+        return decoded
+
+    def initialize_memory_from_file(self, file_name):
+        if self._engine == IntcodeProgram.Engine.TRANSPILED:
+            from .transpiler import load_module
+            self.load_transpiled(load_module(file_name))
+            return
+
+        self.load_memory(MemoryImage.from_file(file_name))
+
+    def dump_memory(self):
+        return self._memory.dump()
+
+    def dump_checkpoint(self):
+        """
+        The baseline image reset() returns to, however far the program has run since
+        """
+        return self._memory.dump_checkpoint()
+
+    def load_memory(self, memory):
+        self._memory.load(memory)
+        self._memory.checkpoint()
+        self._next_instruction = 0
+        self._relative_base_offset = 0
+
+    def load_transpiled(self, module):
+        """
+        Load a program transpiled by transpiler.py.  Memory comes from the module's image and its
+        blocks are cached ready to run, so nothing is parsed or decoded up front.  A block that is
+        written over is dropped and that code falls back to the interpreter
+        """
+        self._memory.load(MemoryImage(module.IMAGE, {}))
+        for start, (end, function) in module.BLOCKS.items():
+            self._memory.add_block(CompiledBlock(start, module.IMAGE[start:end], function))
+        self.checkpoint()
+        self._next_instruction = 0
+        self._relative_base_offset = 0
+
+        if self._block_compiler is None:
+            self._block_compiler = BlockCompiler(self, compile_on_miss=False)
+
+    def checkpoint(self):
+        """
+        Record the current memory as the baseline image reset() returns to
+        """
+        self._memory.checkpoint()
+
+    def reset(self):
+        """
+        Restore the baseline image, putting back only the memory pages written since the last
+        reset, and start over with a clean instruction pointer, relative base and I/O queues
+        """
+        self._memory.restore()
+        self._next_instruction = 0
+        self._relative_base_offset = 0
+        if self._input_queue is not None:
+            self._input_queue.queue.clear()
+        if self._output_queue is not None:
+            self._output_queue.queue.clear()
+
+    def set_memory_address(self, address, code):
+        self._memory[address] = int(code)
+
+    def get_memory_address(self, address):
+        return self._memory[address]
+
+    @property
+    def input_queue(self):
+        return self._input_queue
+
+    @property
+    def output_queue(self):
+        return self._output_queue
+
+    def queue_input(self, value):
+        if self._input_queue is None:
+            raise Exception(f'Queue invalid for current IOScheme')
+        self._input_queue.put(value)
+
+    def queue_inputs(self, values):
+        if self._input_queue is None:
+            raise Exception(f'Queue invalid for current IOScheme')
+        if isinstance(self._input_queue, Channel):
+            self._input_queue.feed_many(values)
+        else:
+            for value in values:
+                self._input_queue.put(value)
+
+    def get_output(self, block=True):
+        if self._output_queue is None:
+            raise Exception(f'Queue invalid for current IOScheme')
+        return self._output_queue.get(block=block)
+
+    def drain_output(self):
+        """
+        Every value currently waiting in the output queue, oldest first
+        """
+        if self._output_queue is None:
+            raise Exception(f'Queue invalid for current IOScheme')
+        if isinstance(self._output_queue, Channel):
+            return self._output_queue.drain()
+
+        outputs = []
+        while True:
+            try:
+                outputs.append(self._output_queue.get(block=False))
+            except Empty:
+                return outputs
+
+    def pending_output(self):
+        if self._output_queue is None:
+            raise Exception(f'Queue invalid for current IOScheme')
+        return self._output_queue.qsize()
+
+    def link_output_to(self, other):
+        if self._output_queue is None or other._input_queue is None:
+            raise Exception(f'Queue invalid for current IOScheme')
+        if not isinstance(other, IntcodeProgram):
+            raise Exception(f'link_output_to requires another IntcodeProgram instance')
+        other._input_queue = self._output_queue
+
+    def fork(self):
+        """
+        Independent copy of this program at its current state.  The copy shares the instruction
+        tables, and memory, with its decode and block caches, is shared copy-on-write with the
+        parent, so a fork costs the page table rather than the whole program.  Any queued input and
+        output is copied across
+        """
+        clone = copy.copy(self)
+        clone._memory = self._memory.fork()
+        if self._visited_states is not None:
+            clone._visited_states = set(self._visited_states)
+        if self._loop_summarizer is not None:
+            clone._loop_summarizer = LoopSummarizer(clone, self._loop_summarizer.verify)
+        if self._block_compiler is not None:
+            clone._block_compiler = BlockCompiler(clone, self._block_compiler.compile_on_miss)
+
+        if self._input_queue is not None:
+            clone._input_queue = type(self._input_queue)()
+            clone._input_queue.queue.extend(self._input_queue.queue)
+        if self._output_queue is not None:
+            clone._output_queue = type(self._output_queue)()
+            clone._output_queue.queue.extend(self._output_queue.queue)
+
+        return clone
+
+    def attach_profiler(self, profiler):
+        """
+        Profile every run_until_io from now on in to profiler, a profiler.Profiler, or stop
+        profiling when given None.  Forks share the profiler with their parent
+        """
+        self._profiler = profiler
+        if profiler is not None:
+            profiler.program = self
+
+    def add_watchpoint(self, addresses, callback):
+        """
+        Call callback(address, value) whenever the program writes to addresses, a single address or
+        any iterable of them such as a range
+        """
+        self._memory.watch([addresses] if isinstance(addresses, int) else addresses, callback)
+
+    def remove_watchpoint(self, addresses, callback):
+        self._memory.unwatch([addresses] if isinstance(addresses, int) else addresses, callback)
+
+    def state_hash(self):
+        """
+        Hash of the whole machine state: memory, instruction pointer and relative base.  The memory
+        part is kept up to date write by write from the first call on, so after that this costs the
+        same however large memory is, and forks carry it with them
+        """
+        self._memory.track_state_hash()
+        return hash((self._memory.state_hash, self._next_instruction, self._relative_base_offset))
+
+    def stop_on_revisit(self, enabled=True):
+        """
+        While enabled, run_until_io returns ExecutionStatus.REVISITED instead of running whenever it
+        would resume from a state_hash, with the same input waiting, that an earlier call resumed from
+        """
+        self._visited_states = set() if enabled else None
+
+    def summarize_loops(self, enabled=True, verify=False):
+        """
+        Let the interpreter fast-forward delay loops, see LoopSummarizer.  With verify, every loop
+        skipped is also stepped through in a fork and checked against, which costs all the time
+        the fast-forward saved and is only meant for debugging
+        """
+        self._loop_summarizer = LoopSummarizer(self, verify) if enabled else None
+
+    def attach_tracer(self, tracer):
+        """
+        Call tracer(opcode, pointer, operands, target) after every instruction from now on, or
+        stop tracing when given None.  Tracing swaps in a table of TracedInstruction handlers and
+        runs them one step at a time, so a program without a tracer pays nothing for it
+        """
+        self._tracer = tracer
+        self._instructions = []
+        self._opcode_table = {}
+        self._superinstructions = {}
+        self._initialize_instruction_set()
+        # Cached decodes still point at the old handlers
+        self._memory.clear_decodes()
+
+    def execute_next(self):
+        instruction, parameter_modes, _ = self.decode_instruction(self._next_instruction)
+
+        execution_context = IntcodeProgram.ExecutionContext(
+            extended_opcode=self._memory[self._next_instruction],
+            execution_pointer=self._next_instruction,
+            program_memory=self._memory,
+            input_queue=self._input_queue,
+            output_queue=self._output_queue,
+            relative_base=self._relative_base_offset,
+            input_prompt=self._input_prompt,
+            output_format=self._output_format,
+        )
+
+        instruction.execute(execution_context, parameter_modes)
+
+        self._next_instruction = execution_context.execution_pointer
+        self._relative_base_offset = execution_context.relative_base
+
+    def step(self):
+        """
+        Execute a single instruction and return an ExecutionStatus.  A program starved of input or
+        sitting on a halt is left where it is, instead of raising WaitingForInput or ProgramHalted
+        """
+        instruction, _, _ = self.decode_instruction(self._next_instruction)
+
+        if instruction.opcode == 99:
+            return IntcodeProgram.ExecutionStatus.HALTED
+        if instruction.opcode == 3 and self._input_queue is not None and not self._input_queue.qsize():
+            return IntcodeProgram.ExecutionStatus.NEEDS_INPUT
+
+        self.execute_next()
+
+        if instruction.opcode == 4:
+            return IntcodeProgram.ExecutionStatus.OUTPUT_READY
+        return IntcodeProgram.ExecutionStatus.RUNNING
+
+    def run_until_io(self):
+        """
+        Run until the program needs input, produces output or halts and return the matching
+        ExecutionStatus.  A program with a tracer attached steps through its traced handlers,
+        programs built with the block compiler or transpiled engines hand the run over to the block
+        compiler, and everything else is interpreted
+        """
+        if self._visited_states is not None:
+            state = (self.state_hash(), tuple(self._input_queue.queue) if self._input_queue is not None else ())
+            if state in self._visited_states:
+                return IntcodeProgram.ExecutionStatus.REVISITED
+            self._visited_states.add(state)
+
+        if self._profiler is None:
+            return self._dispatch_until_io()
+
+        started = time.perf_counter()
+        status = self._dispatch_until_io()
+        self._profiler.record_run(status, time.perf_counter() - started)
+        return status
+
+    def _dispatch_until_io(self):
+        if self._tracer is not None:
+            # Traced handlers only run through step()
+            status = self.step()
+            while status == IntcodeProgram.ExecutionStatus.RUNNING:
+                status = self.step()
+            return status
+
+        if self._block_compiler is not None:
+            return self._block_compiler.run_until_io()
+        return self._interpret_until_io()
+
+    def _interpret_until_io(self, stop_at=None):
+        """
+        The interpreter behind run_until_io.  The pointer, relative base and memory are kept in
+        locals and every instruction is dispatched inline, so no per-instruction objects are built.
+        Given stop_at, such as the compiled block cache, it also returns ExecutionStatus.RUNNING as
+        soon as a branch lands on one of its addresses
+        """
+        memory = self._memory
+        pages = memory.pages
+        page_bits = IntcodeMemory.PAGE_BITS
+        page_mask = IntcodeMemory.PAGE_MASK
+        size = memory.size
+        plain_pages = memory.plain_pages
+        decode_cache = memory.decode_cache
+        decode_instruction = self.decode_instruction
+        input_queue = self._input_queue
+        output_queue = self._output_queue
+        pointer = self._next_instruction
+        relative_base = self._relative_base_offset
+        address_counts = self._profiler.address_counts if self._profiler is not None else None
+        loop_summarizer = self._loop_summarizer
+
+        try:
+            while True:
+                if address_counts is not None:
+                    address_counts[pointer] += 1
+                decoded = decode_cache.get(pointer)
+                if decoded is None:
+                    decoded = decode_instruction(pointer)
+                opcode = decoded[0].opcode
+                parameter_modes = decoded[1]
+
+                if opcode in (1, 2, 7, 8):
+                    offset = pointer & page_mask
+                    if pointer < size and offset + 3 <= page_mask:
+                        page = pages[pointer >> page_bits]
+                        first = page[offset + 1]
+                        second = page[offset + 2]
+                        target = page[offset + 3]
+                    else:
+                        first = memory[pointer + 1]
+                        second = memory[pointer + 2]
+                        target = memory[pointer + 3]
+                    first_mode, second_mode, target_mode = parameter_modes
+                    if first_mode != 1:
+                        if first_mode == 2:
+                            first += relative_base
+                        first = pages[first >> page_bits][first & page_mask] if 0 <= first < size else memory[first]
+                    if second_mode != 1:
+                        if second_mode == 2:
+                            second += relative_base
+                        second = pages[second >> page_bits][second & page_mask] if 0 <= second < size else memory[second]
+                    if target_mode == 2:
+                        target += relative_base
+
+                    if opcode == 1:
+                        value = first + second
+                    elif opcode == 2:
+                        value = first * second
+                    elif opcode == 7:
+                        value = 1 if first < second else 0
+                    else:
+                        value = 1 if first == second else 0
+                    # Pages with nothing cached or watched on them are written straight in to
+                    if 0 <= target < size and plain_pages[target >> page_bits]:
+                        pages[target >> page_bits][target & page_mask] = value
+                    else:
+                        memory[target] = value
+                        if target >= size:
+                            size = memory.size
+                    pointer += 4
+
+                elif opcode > 100:
+                    # Superinstructions, see MoveInstruction and CompareBranchInstruction
+                    offset = pointer & page_mask
+                    if pointer < size and offset + 6 <= page_mask:
+                        page = pages[pointer >> page_bits]
+                        first = page[offset + 1]
+                        second = page[offset + 2]
+                        target = page[offset + 3]
+                    else:
+                        first = memory[pointer + 1]
+                        second = memory[pointer + 2]
+                        target = memory[pointer + 3]
+                        page = None
+                    first_mode = parameter_modes[0]
+                    if first_mode != 1:
+                        if first_mode == 2:
+                            first += relative_base
+                        first = pages[first >> page_bits][first & page_mask] if 0 <= first < size else memory[first]
+                    if parameter_modes[2] == 2:
+                        target += relative_base
+
+                    if opcode == 110:
+                        if 0 <= target < size and plain_pages[target >> page_bits]:
+                            pages[target >> page_bits][target & page_mask] = first
+                        else:
+                            memory[target] = first
+                            if target >= size:
+                                size = memory.size
+                        pointer += 4
+                        continue
+
+                    second_mode = parameter_modes[1]
+                    if second_mode != 1:
+                        if second_mode == 2:
+                            second += relative_base
+                        second = pages[second >> page_bits][second & page_mask] if 0 <= second < size else memory[second]
+
+                    if opcode == 120:
+                        if 0 <= target < size and plain_pages[target >> page_bits]:
+                            pages[target >> page_bits][target & page_mask] = second
+                        else:
+                            memory[target] = second
+                            if target >= size:
+                                size = memory.size
+                        pointer += 4
+                        continue
+
+                    flag = (1 if first < second else 0) if opcode < 180 else (1 if first == second else 0)
+                    if 0 <= target < size and plain_pages[target >> page_bits]:
+                        pages[target >> page_bits][target & page_mask] = flag
+                    else:
+                        memory[target] = flag
+                        if target >= size:
+                            size = memory.size
+
+                    if address_counts is not None and not pointer + 4 <= target <= pointer + 5:
+                        # Profiled as the compare, counted above, and the jump it stands for
+                        address_counts[pointer + 4] += 1
+                    if pointer + 4 <= target <= pointer + 5:
+                        # The store rewrote the jump, carry on from it as it now stands
+                        pointer += 4
+                    elif (flag != 0) == (opcode & 1 == 1):
+                        # Fetched afresh, as the store may have just copied this page or set this cell
+                        if page is not None:
+                            destination = pages[pointer >> page_bits][offset + 6]
+                        else:
+                            destination = memory[pointer + 6]
+                        destination_mode = parameter_modes[5]
+                        if destination_mode != 1:
+                            if destination_mode == 2:
+                                destination += relative_base
+                            destination = memory[destination]
+                        if loop_summarizer is not None and destination <= pointer:
+                            if loop_summarizer.fast_forward(destination, pointer + 4, relative_base):
+                                size = memory.size
+                        pointer = destination
+                    else:
+                        pointer += 7
+                    if stop_at is not None and pointer in stop_at:
+                        return IntcodeProgram.ExecutionStatus.RUNNING
+
+                elif opcode in (5, 6):
+                    offset = pointer & page_mask
+                    if pointer < size and offset + 2 <= page_mask:
+                        page = pages[pointer >> page_bits]
+                        value = page[offset + 1]
+                        destination = page[offset + 2]
+                    else:
+                        value = memory[pointer + 1]
+                        destination = memory[pointer + 2]
+                    value_mode, destination_mode = parameter_modes
+                    if value_mode != 1:
+                        if value_mode == 2:
+                            value += relative_base
+                        value = pages[value >> page_bits][value & page_mask] if 0 <= value < size else memory[value]
+                    if destination_mode != 1:
+                        if destination_mode == 2:
+                            destination += relative_base
+                        if 0 <= destination < size:
+                            destination = pages[destination >> page_bits][destination & page_mask]
+                        else:
+                            destination = memory[destination]
+
+                    if (value != 0) == (opcode == 5):
+                        if loop_summarizer is not None and destination <= pointer:
+                            if loop_summarizer.fast_forward(destination, pointer, relative_base):
+                                size = memory.size
+                        pointer = destination
+                    else:
+                        pointer += 3
+                    if stop_at is not None and pointer in stop_at:
+                        return IntcodeProgram.ExecutionStatus.RUNNING
+
+                elif opcode == 9:
+                    value = memory[pointer + 1]
+                    if parameter_modes[0] != 1:
+                        if parameter_modes[0] == 2:
+                            value += relative_base
+                        value = memory[value]
+                    relative_base += value
+                    pointer += 2
+
+                elif opcode == 3:
+                    target = memory[pointer + 1]
+                    if parameter_modes[0] == 2:
+                        target += relative_base
+                    if input_queue is not None:
+                        try:
+                            memory[target] = input_queue.get(block=False)
+                        except Empty:
+                            if address_counts is not None:
+                                # Not run until its input arrives, as in step()
+                                address_counts[pointer] -= 1
+                            return IntcodeProgram.ExecutionStatus.NEEDS_INPUT
+                    else:
+                        memory[target] = int(input(self._input_prompt))
+                    if target >= size:
+                        size = memory.size
+                    pointer += 2
+
+                elif opcode == 4:
+                    value = memory[pointer + 1]
+                    if parameter_modes[0] != 1:
+                        if parameter_modes[0] == 2:
+                            value += relative_base
+                        value = memory[value]
+                    if output_queue is not None:
+                        output_queue.put(value)
+                    else:
+                        print(self._output_format.format(value))
+                    pointer += 2
+                    return IntcodeProgram.ExecutionStatus.OUTPUT_READY
+
+                elif opcode == 99:
+                    if address_counts is not None:
+                        # A halt is where the program stops, not an instruction it runs, as in step()
+                        address_counts[pointer] -= 1
+                    return IntcodeProgram.ExecutionStatus.HALTED
+
+                else:
+                    raise InvalidOpCode(opcode, pointer)
+        finally:
+            self._next_instruction = pointer
+            self._relative_base_offset = relative_base
+
+    def as_coroutine(self):
+        """
+        Generator over a running program.  Every output value is yielded as it is produced, followed
+        by ExecutionStatus.NEEDS_INPUT whenever the program is starved of input and a final
+        ExecutionStatus.HALTED.  A value passed in with send() is queued as the next input
+        """
+        if self._input_queue is None or self._output_queue is None:
+            raise Exception(f'Queue invalid for current IOScheme')
+        input_queue = self._input_queue
+        output_queue = self._output_queue
+
+        while True:
+            status = self.run_until_io()
+
+            if status == IntcodeProgram.ExecutionStatus.OUTPUT_READY:
+                value = yield output_queue.get()
+            elif status == IntcodeProgram.ExecutionStatus.NEEDS_INPUT:
+                value = yield status
+            else:
+                yield status
+                return
+
+            if value is not None:
+                input_queue.put(value)
+
+    def run_to_end(self):
+        try:
+            while True:
+                status = self.run_until_io()
+                if status == IntcodeProgram.ExecutionStatus.NEEDS_INPUT:
+                    raise WaitingForInput()
+                if status in (IntcodeProgram.ExecutionStatus.HALTED, IntcodeProgram.ExecutionStatus.REVISITED):
+                    break
+        except InvalidOpCode as exc:
+            print(exc)
@@ -0,0 +1,50 @@
+from collections import defaultdict, deque
+
+
+class Scheduler:
+    """
+    Cooperative scheduler for any network of IntcodePrograms sharing queues.  Each ready program runs
+    until it blocks on input or halts, and a blocked program is only made ready again when one of the
+    programs writing to its input queue produces output
+    """
+
+    def __init__(self, programs):
+        self.programs = list(programs)
+        self.halted = set()
+        self._readers = defaultdict(list)
+        for program in self.programs:
+            self._readers[id(program.input_queue)].append(program)
+        self._ready = deque(self.programs)
+        self._is_ready = set(self.programs)
+
+    def wake(self, program):
+        if program not in self._is_ready and program not in self.halted:
+            self._ready.append(program)
+            self._is_ready.add(program)
+
+    @staticmethod
+    def run_until_blocked(program):
+        """
+        Run program until it halts (True) or is starved of input (False)
+        """
+        status = program.run_until_io()
+        while status == program.ExecutionStatus.OUTPUT_READY:
+            status = program.run_until_io()
+        return status == program.ExecutionStatus.HALTED
+
+    def run(self):
+        """
+        Run until every program has halted or none of them can make progress
+        """
+        while self._ready:
+            program = self._ready.popleft()
+            self._is_ready.discard(program)
+
+            if Scheduler.run_until_blocked(program):
+                self.halted.add(program)
+
+            if not program.output_queue.empty():
+                for reader in self._readers[id(program.output_queue)]:
+                    self.wake(reader)
+
+        return len(self.halted) == len(self.programs)
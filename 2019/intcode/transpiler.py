@@ -0,0 +1,183 @@
+import argparse
+import hashlib
+import importlib.util
+import os
+import sys
+from .compiler import BlockCompiler
+from .exceptions import InvalidOpCode, InvalidParameterMode
+from .memory import CACHE_DIRECTORY, MemoryImage, write_cache_file
+from .program import IntcodeProgram
+
+
+TRANSPILER_VERSION = 4
+
+# Modules already imported by this process, by path
+_modules = {}
+
+
+class Transpiler:
+    """
+    Ahead-of-time translation of a whole Intcode program in to a Python module.  Every basic block
+    reachable from address 0, or from an immediate value that could be a jump target (such as a
+    return address pushed before a call), is generated up front and collected in a dispatch table
+    keyed by start address.  Writes that land on code are reported as self-modifying
+    """
+
+    def __init__(self, cells):
+        self.cells = list(cells)
+        self.program = IntcodeProgram()
+        self.program.load_memory(MemoryImage(self.cells, {}))
+        self.compiler = BlockCompiler(self.program)
+
+    def find_blocks(self):
+        """
+        Decode every block start and return them as start: (instructions, end, reached), where
+        reached is False for blocks found only from an immediate value that might not be code
+        """
+        blocks = {}
+        pending = [(0, True)]
+
+        while pending:
+            start, reached = pending.pop()
+            if not 0 <= start < len(self.cells) or (start in blocks and (blocks[start][2] or not reached)):
+                continue
+            instructions, end = self.compiler.decode_block(start)
+            blocks[start] = (instructions, end, reached)
+
+            for _, opcode, parameter_modes, operands in instructions:
+                jump_target = operands[-1] if opcode in BlockCompiler.BRANCHES else None
+                for operand, mode in zip(operands, parameter_modes):
+                    if mode == 1:
+                        pending.append((operand, reached and operand == jump_target))
+
+            # Carry on past the instruction that ended the block, stepping over any I/O
+            try:
+                instruction, _, parameter_count = self.program.decode_instruction(end)
+            except (InvalidOpCode, InvalidParameterMode):
+                continue
+            if instruction.opcode in (3, 4):
+                pending.append((end + parameter_count + 1, reached))
+            elif instruction.opcode != 99:
+                pending.append((end, reached and not self._always_jumps(instructions)))
+
+        return {start: block for start, block in blocks.items() if block[0]}
+
+    @staticmethod
+    def _always_jumps(instructions):
+        # Only a return to the next instruction (a call) reaches past an unconditional jump
+        if not instructions:
+            return False
+        _, opcode, parameter_modes, operands = instructions[-1]
+        return opcode in (5, 6) and parameter_modes[0] == 1 and (operands[0] != 0) == (opcode == 5)
+
+    def find_self_modifying_writes(self, blocks):
+        code_cells = set()
+        for start, (_, end, reached) in blocks.items():
+            if reached:
+                code_cells.update(range(start, end))
+
+        return sorted({
+            address
+            for instructions, _, reached in blocks.values() if reached
+            for address, opcode, parameter_modes, operands in instructions
+            if opcode in BlockCompiler.WRITES and parameter_modes[2] != 2 and operands[2] in code_cells
+        })
+
+    def source(self, program_hash):
+        blocks = self.find_blocks()
+        self_modifying_writes = self.find_self_modifying_writes(blocks)
+
+        lines = [
+            '"""',
+            f'Intcode program {program_hash} transpiled ahead of time by transpiler.py, do not edit',
+            '"""',
+            'import sys',
+            '',
+            f'PROGRAM_HASH = {program_hash!r}',
+            f'TRANSPILER_VERSION = {TRANSPILER_VERSION}',
+            f'IMAGE = {tuple(self.cells)!r}',
+            f'SELF_MODIFYING_WRITES = {tuple(self_modifying_writes)!r}',
+            '',
+        ]
+
+        for start in sorted(blocks):
+            instructions, end, _ = blocks[start]
+            lines.append('')
+            lines.append(BlockCompiler.generate_source(start, end, instructions, name=f'block_{start}'))
+            lines.append('')
+
+        lines.append('')
+        lines.append('BLOCKS = {')
+        lines.extend(f'    {start}: ({blocks[start][1]}, block_{start}),' for start in sorted(blocks))
+        lines.append('}')
+        lines.extend([
+            '',
+            '',
+            'def run(io):',
+            '    """',
+            '    Load this program in to io, an IntcodeProgram, and run it until it halts or waits for input',
+            '    """',
+            '    io.load_transpiled(sys.modules[__name__])',
+            '    status = io.run_until_io()',
+            '    while status == io.ExecutionStatus.OUTPUT_READY:',
+            '        status = io.run_until_io()',
+            '    return status',
+            '',
+        ])
+
+        return '\n'.join(lines)
+
+
+def cache_path(file_name, cache_directory=None):
+    with open(file_name, 'rb') as program_file:
+        program_hash = hashlib.sha256(program_file.read()).hexdigest()
+
+    if cache_directory is None:
+        cache_directory = os.path.join(os.path.dirname(os.path.abspath(file_name)), CACHE_DIRECTORY)
+    return os.path.join(cache_directory, f'program_{program_hash[:16]}_v{TRANSPILER_VERSION}.py'), program_hash
+
+
+def load_module(file_name, cache_directory=None):
+    """
+    Transpiled module for the Intcode program in file_name.  Modules are cached on disk keyed by the
+    hash of the program, so a program is only parsed and decoded the first time it is seen
+    """
+    path, program_hash = cache_path(file_name, cache_directory)
+
+    if path not in _modules:
+        if not os.path.exists(path):
+            cells = MemoryImage.from_file(file_name, cache_directory).cells
+            if not write_cache_file(path, Transpiler(cells).source(program_hash).encode()):
+                raise Exception(f'Failed writing transpiled module {path}')
+
+        spec = importlib.util.spec_from_file_location(os.path.basename(path)[:-3], path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[spec.name] = module
+        spec.loader.exec_module(module)
+        _modules[path] = module
+
+    return _modules[path]
+
+
+def main(prog='python -m intcode.transpiler'):
+    """
+    The compile command, run as python ../intcode compile input.txt from a day directory (see
+    __main__.py)
+    """
+    parser = argparse.ArgumentParser(prog=prog, description='Ahead-of-time Intcode to Python transpiler')
+    commands = parser.add_subparsers(dest='command', required=True)
+    compile_command = commands.add_parser('compile', help='Transpile an Intcode program in to the cache')
+    compile_command.add_argument('file_name')
+    compile_command.add_argument('--cache-dir', default=None)
+    args = parser.parse_args()
+
+    if args.command == 'compile':
+        module = load_module(args.file_name, args.cache_dir)
+        print(f'{module.__file__}: {len(module.IMAGE)} cells, {len(module.BLOCKS)} blocks')
+        if module.SELF_MODIFYING_WRITES:
+            print(f'Self-modifying writes at {list(module.SELF_MODIFYING_WRITES)}, '
+                  f'blocks they overwrite fall back to the interpreter')
+
+
+if __name__ == '__main__':
+    main()
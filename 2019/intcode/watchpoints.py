@@ -0,0 +1,51 @@
+class WatchpointDiscovery:
+    """
+    Discovery mode for watchpoints.  Every address in addresses is watched, and each time an output
+    of interest is seen it is passed to sample() under a label.  An address stays a candidate for a
+    label while it holds the sampled value at every sample, having been written since the previous
+    one whenever that value changed, so the candidates narrow to the addresses that change in step
+    with the output
+    """
+
+    def __init__(self, program, addresses):
+        self.program = program
+        self.addresses = addresses
+        self.candidates = {}
+        self._clock = 0
+        self._last_written = {}
+        self._last_sample = {}
+        program.add_watchpoint(addresses, self._written)
+
+    def _written(self, address, value):
+        self._last_written[address] = self._clock
+
+    def sample(self, label, value):
+        if label not in self.candidates:
+            # Anything holding the first value could be it, whether or not it has been written yet
+            self.candidates[label] = {
+                address for address in self.addresses if self.program.get_memory_address(address) == value
+            }
+        else:
+            since, previous_value = self._last_sample[label]
+            self.candidates[label] = {
+                address
+                for address in self.candidates[label]
+                if self.program.get_memory_address(address) == value and
+                (value == previous_value or self._last_written.get(address, -1) > since)
+            }
+
+        self._last_sample[label] = (self._clock, value)
+        self._clock += 1
+
+    def located(self, label):
+        """
+        The one address left for label, or None while there is more than one candidate (or none)
+        """
+        candidates = self.candidates.get(label, ())
+        return next(iter(candidates)) if len(candidates) == 1 else None
+
+    def report(self):
+        return {label: sorted(candidates) for label, candidates in self.candidates.items()}
+
+    def close(self):
+        self.program.remove_watchpoint(self.addresses, self._written)
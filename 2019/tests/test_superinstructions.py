@@ -0,0 +1,66 @@
+#!/usr/bin/python3
+import os
+import sys
+import unittest
+
+# The shared Intcode package lives alongside the day directories
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from intcode import IntcodeProgram, MemoryImage
+from intcode.exceptions import ProgramHalted
+
+
+class SuperinstructionTest(unittest.TestCase):
+    """
+    Every way of running a program has to agree with a traced run, which executes the program's
+    own instructions one at a time with nothing fused
+    """
+
+    @staticmethod
+    def build(cells, engine=IntcodeProgram.Engine.INTERPRETER, tracer=None):
+        program = IntcodeProgram(io_scheme=IntcodeProgram.IOScheme.QUEUE, engine=engine, tracer=tracer)
+        program.load_memory(MemoryImage(cells, {}))
+        return program
+
+    @staticmethod
+    def run_until_halted(program):
+        outputs = []
+        while program.run_until_io() != IntcodeProgram.ExecutionStatus.HALTED:
+            outputs.extend(program.drain_output())
+        outputs.extend(program.drain_output())
+        return outputs, program._next_instruction
+
+    @staticmethod
+    def step_until_halted(program):
+        while program.step() != IntcodeProgram.ExecutionStatus.HALTED:
+            pass
+        return program.drain_output(), program._next_instruction
+
+    @staticmethod
+    def execute_until_halted(program):
+        try:
+            while True:
+                program.execute_next()
+        except ProgramHalted:
+            return program.drain_output(), program._next_instruction
+
+    def assert_runs_agree(self, cells):
+        expected = self.run_until_halted(self.build(cells, tracer=lambda *arguments: None))
+        self.assertEqual(expected, self.run_until_halted(self.build(cells)))
+        self.assertEqual(expected, self.step_until_halted(self.build(cells)))
+        self.assertEqual(expected, self.execute_until_halted(self.build(cells)))
+        self.assertEqual(expected, self.run_until_halted(self.build(cells, IntcodeProgram.Engine.BLOCK_COMPILER)))
+        return expected
+
+    def test_compare_stored_over_jump_destination(self):
+        # The compare's temporary is the jump's destination cell, so the jump goes to the flag
+        cells = [1108, 99, 99, 6, 1005, 6, 20] + [0] * 13 + [104, 555, 99]
+        self.assertEqual(([], 1), self.assert_runs_agree(cells))
+
+    def test_long_run_of_compares(self):
+        # Fusing one compare must not go on to fuse the compare after it, and so on down the run
+        cells = [1108, 1, 1, 5000] * 600 + [104, 7, 99]
+        self.assertEqual(([7], 2402), self.assert_runs_agree(cells))
+
+
+if __name__ == '__main__':
+    unittest.main()